@@ -0,0 +1,186 @@
+"""
+Советник по индексам для списков ModelAdmin (SQLite).
+
+Для каждой зарегистрированной модели строит те же запросы, что и index_list
+(фильтр по колонке, сортировка по колонке, поиск), прогоняет их через
+EXPLAIN QUERY PLAN и помечает полные сканы таблицы и временные B-tree для
+ORDER BY. Для фильтров/сортировок без индекса предлагает CREATE INDEX.
+
+    python -m admin.advisor app.server            # отчёт + CREATE INDEX
+    python -m admin.advisor app.server --apply    # создать недостающие индексы
+"""
+import re
+from typing import Iterable, List, Optional, Sequence, TypedDict
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+
+from .index_list import index_query
+from .model import ModelAdmin
+from .search import get_index
+from . import site
+
+
+SCAN_PATTERN = re.compile(r'^SCAN (\w+)$')
+TEMP_SORT_MARKER = 'USE TEMP B-TREE'
+
+
+class PlanCheck(TypedDict):
+    model: str
+    kind: str  # 'filter' | 'order' | 'search'
+    column: Optional[str]
+    sql: str
+    plan: List[str]
+    full_scan: bool
+    temp_sort: bool
+    suggestion: Optional[str]
+
+
+def index_name(table: str, column: str) -> str:
+    # * то же имя, что даёт Column(index=True) - объявление в модели совпадёт с созданным индексом
+    return f'ix_{table}_{column}'
+
+
+def create_index_statement(table: str, column: str) -> str:
+    return f'CREATE INDEX IF NOT EXISTS {index_name(table, column)} ON {table} ({column})'
+
+
+def explain(connection: Connection, statement) -> List[str]:
+    """EXPLAIN QUERY PLAN -> строки detail"""
+    compiled = statement.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup or ())
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled.string}', params).all()
+    return list([row[-1] for row in rows])
+
+
+def candidate_columns(model_admin: ModelAdmin) -> dict:
+    """
+    Колонки списка, которым может понадобиться индекс:
+    filter - list_filter + внешние ключи, order - колонки list_display,
+    search - search_columns. Первичный ключ пропускается - он уже индекс
+    """
+    table = model_admin.model.__table__
+    pk = set([c.name for c in table.primary_key.columns])
+    columns = table.columns
+
+    filter_columns = list(model_admin.list_filter) + [c.name for c in columns if c.foreign_keys]
+    order_columns = [name for name in model_admin.display_plan.names if name in columns]
+
+    return {
+        'filter': list([c for c in dict.fromkeys(filter_columns) if c in columns and c not in pk]),
+        'order': list([c for c in dict.fromkeys(order_columns) if c not in pk]),
+        'search': list([c for c in model_admin.search_columns if c in columns]),
+    }
+
+
+def _check(
+    connection: Connection,
+    model_admin: ModelAdmin,
+    kind: str,
+    column: Optional[str],
+    **params
+) -> PlanCheck:
+    model = model_admin.model
+    # * check_site уже убедился, что это SQLite
+    search_index = get_index(model) if kind == 'search' and model_admin.search_fts else None
+    statement = index_query(
+        model,
+        model_admin.get_list_statement(None),
+        model_admin.search_columns,
+        search_index=search_index,
+        **params
+    )
+    plan = explain(connection, statement)
+    table = model.__table__.name
+    scanned = [match.group(1) for match in map(SCAN_PATTERN.match, plan) if match]
+    full_scan = table in scanned
+    temp_sort = any(TEMP_SORT_MARKER in detail for detail in plan)
+
+    suggestion = None
+    if kind == 'filter' and full_scan or kind == 'order' and temp_sort:
+        suggestion = create_index_statement(table, column)
+
+    return PlanCheck(
+        model=model.__name__,
+        kind=kind,
+        column=column,
+        sql=str(statement.compile(dialect=connection.dialect)),
+        plan=plan,
+        full_scan=full_scan,
+        temp_sort=temp_sort,
+        suggestion=suggestion,
+    )
+
+
+def check_model_admin(connection: Connection, model_admin: ModelAdmin) -> List[PlanCheck]:
+    columns = candidate_columns(model_admin)
+    checks = list()
+    for column in columns['filter']:
+        checks.append(_check(connection, model_admin, 'filter', column, filters={column: 0}))
+    for column in columns['order']:
+        checks.append(_check(connection, model_admin, 'order', column, order=column))
+    if columns['search']:
+        # * LIKE '%...%' индекс не использует - для поиска есть search_fts
+        checks.append(_check(connection, model_admin, 'search', None, search='a'))
+    return checks
+
+
+def check_site(connection: Connection, model_names: Optional[Sequence[str]] = None) -> List[PlanCheck]:
+    """Проверка всех (или указанных) зарегистрированных моделей"""
+    if connection.dialect.name != 'sqlite':
+        raise ValueError(f'EXPLAIN QUERY PLAN is SQLite only, got {connection.dialect.name}')
+    checks = list()
+    for name in model_names or list(site.storage.keys()):
+        model_admin = site.get_model_admin_instance(name)
+        if not inspect(connection).has_table(model_admin.model.__table__.name):
+            continue
+        checks.extend(check_model_admin(connection, model_admin))
+    return checks
+
+
+def suggestions(checks: Iterable[PlanCheck]) -> List[str]:
+    return list(dict.fromkeys([c['suggestion'] for c in checks if c['suggestion']]))
+
+
+def apply_suggestions(engine: Engine, statements: Sequence[str]):
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+
+
+def format_report(checks: Sequence[PlanCheck]) -> str:
+    lines = list()
+    for check in checks:
+        flags = [flag for flag, on in (('FULL SCAN', check['full_scan']), ('TEMP B-TREE', check['temp_sort'])) if on]
+        target = f"{check['kind']} {check['column']}" if check['column'] else check['kind']
+        lines.append(f"{check['model']}: {target} [{', '.join(flags) or 'ok'}]")
+        lines.extend(f'    {detail}' for detail in check['plan'])
+    statements = suggestions(checks)
+    if statements:
+        lines.append('')
+        lines.extend(f'{statement};' for statement in statements)
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    import argparse
+    import importlib
+
+    parser = argparse.ArgumentParser(prog='python -m admin.advisor', description='Index advisor for admin lists')
+    parser.add_argument('module', help='module that registers models and exposes `engine`, e.g. app.server')
+    parser.add_argument('--model', action='append', help='check only these models')
+    parser.add_argument('--apply', action='store_true', help='create suggested indexes')
+    args = parser.parse_args(argv)
+
+    engine = importlib.import_module(args.module).engine
+    with engine.connect() as connection:
+        checks = check_site(connection, args.model)
+    print(format_report(checks))
+
+    statements = suggestions(checks)
+    if args.apply and statements:
+        apply_suggestions(engine, statements)
+        print(f'\napplied {len(statements)} statement(s)')
+
+
+if __name__ == '__main__':
+    main()
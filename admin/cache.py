@@ -0,0 +1,168 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as time_
+from decimal import Decimal
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .types import SQLAlchemyModel
+from . import settings
+
+
+CHANGED_KEY = 'admin_changed_tables'
+
+
+class TableVersions:
+    """
+    Счётчики версий таблиц. Версия растёт при каждом flush, затронувшем таблицу
+    (и bulk update/delete через do_orm_execute), и ещё раз на commit / rollback -
+    страница, прочитанная между flush и commit, не переживёт фиксацию.
+    Записи в обход ORM (сырой SQL, Core insert) версию не меняют.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, int] = dict()
+        self._lock = threading.Lock()
+
+        event.listen(Session, 'after_flush', self._on_flush)
+        event.listen(Session, 'do_orm_execute', self._on_orm_execute)
+        event.listen(Session, 'after_commit', self._on_end)
+        event.listen(Session, 'after_soft_rollback', self._on_rollback)
+
+    def get(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        versions = self._versions
+        return tuple([versions.get(table, 0) for table in tables])
+
+    def bump(self, tables: Iterable[str]):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def _mark(self, session: Session, tables: Set[str]):
+        if not tables:
+            return
+        self.bump(tables)
+        session.info.setdefault(CHANGED_KEY, set()).update(tables)
+
+    def _on_flush(self, session: Session, flush_context):
+        tables = set()
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            tables.update(table.name for table in inspect(obj).mapper.tables)
+        self._mark(session, tables)
+
+    def _on_orm_execute(self, orm_execute_state):
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            self._mark(orm_execute_state.session, set([table.name for table in mapper.tables]))
+
+    def _on_end(self, session: Session):
+        self.bump(session.info.pop(CHANGED_KEY, ()))
+
+    def _on_rollback(self, session: Session, previous_transaction):
+        self._on_end(session)
+
+
+class ResultCache:
+    """
+    LRU кэш готовых страниц списка (строки list_display + курсоры).
+    Ограничен к-вом записей и примерным объёмом в байтах; ключ должен
+    включать версии таблиц (TableVersions) - устаревшие записи просто
+    перестают находиться и вытесняются.
+    ttl > 0 - запись живёт не дольше ttl секунд (записи других процессов
+    и в обход ORM версии таблиц не меняют)
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 8 * 1024 * 1024, ttl: float = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # * key -> (значение, размер, момент устаревания по time.monotonic или None)
+        self._entries: OrderedDict[Hashable, Tuple[Any, int, Optional[float]]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and time.monotonic() > entry[2]:
+                self._entries.pop(key)
+                self._bytes -= entry[1]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, size: int):
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+SCALAR_TYPES = (str, int, float, Decimal, date, datetime, time_, type(None))
+
+
+def scalar_values(values: Iterable[Any]) -> Tuple[Any, ...]:
+    """
+    Значения строки для кэша: скаляры как есть, прочее (ORM объекты связей) - str,
+    как их и выводит шаблон. Кэш не держит объекты закрытой сессии
+    """
+    return tuple([value if isinstance(value, SCALAR_TYPES) else str(value) for value in values])
+
+
+def estimate_size(rows: Iterable[Iterable[Any]]) -> int:
+    """Грубая оценка объёма строк: контейнеры + значения"""
+    size = 0
+    for row in rows:
+        size += sys.getsizeof(row)
+        for value in row:
+            size += sys.getsizeof(value)
+    return size
+
+
+def model_tables(model: SQLAlchemyModel) -> Tuple[str, ...]:
+    """Таблицы, от которых зависит список модели: своя + цели relationship (display-методы)"""
+    mapper = inspect(model)
+    tables = [table.name for table in mapper.tables]
+    for relationship in mapper.relationships:
+        tables.extend(table.name for table in relationship.mapper.tables)
+    return tuple(sorted(set(tables)))
+
+
+table_versions = TableVersions()
+
+list_cache = ResultCache(
+    max_entries=settings.get_setting('list_cache', 'max_entries'),
+    max_bytes=settings.get_setting('list_cache', 'max_bytes'),
+    ttl=settings.get_setting('list_cache', 'ttl'),
+)
@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple, Type
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, object_session
+
+from .types import SQLAlchemyModel
+
+
+PENDING_KEY = 'admin_counts_pending'
+RESYNC_KEY = 'admin_counts_resync'
+
+
+class CountCache:
+    """
+    Кэш к-ва записей моделей для сайдбара.
+
+    Значение читается из БД один раз (seed) и дальше поддерживается событиями
+    SQLAlchemy: after_insert / after_delete, а bulk insert/delete (do_orm_execute)
+    помечают модель на пересчёт. Изменения копятся в session.info и применяются
+    только после commit, при rollback — отбрасываются.
+    ttl > 0 включает периодическую пересинхронизацию с БД (записи в обход ORM).
+    """
+
+    def __init__(self, ttl: float = 0):
+        self.ttl = ttl
+        self._counts: Dict[Type[SQLAlchemyModel], int] = dict()
+        self._synced_at: Dict[Type[SQLAlchemyModel], float] = dict()
+        self._models = set()
+        self._lock = threading.Lock()
+
+        event.listen(Session, 'do_orm_execute', self._on_orm_execute)
+        event.listen(Session, 'after_commit', self._on_commit)
+        event.listen(Session, 'after_soft_rollback', self._on_rollback)
+
+    def watch(self, model: Type[SQLAlchemyModel]):
+        """Подписывает модель на события вставки/удаления"""
+        if model in self._models:
+            return
+        event.listen(model, 'after_insert', self._on_insert)
+        event.listen(model, 'after_delete', self._on_delete)
+        self._models.add(model)
+
+    def get(self, session: Session, model: Type[SQLAlchemyModel]) -> int:
+        # * оба значения - под одной блокировкой: invalidate / sync между чтениями не даст KeyError
+        with self._lock:
+            size = self._counts.get(model)
+            synced_at = self._synced_at.get(model)
+        expired = self.ttl > 0 and synced_at is not None and time.monotonic() - synced_at > self.ttl
+        if size is None or synced_at is None or expired:
+            return self.sync(session, model)
+        return size
+
+    def sync(self, session: Session, model: Type[SQLAlchemyModel]) -> int:
+        """Перечитывает к-во записей модели из БД"""
+        size = session.scalar(select(func.count()).select_from(model))
+        with self._lock:
+            self._counts[model] = size
+            self._synced_at[model] = time.monotonic()
+        return size
+
+    def sizes(self, session: Session, models: Sequence[Type[SQLAlchemyModel]]) -> List[Tuple[str, int]]:
+        return list([(model.__name__, self.get(session, model)) for model in models])
+
+    def invalidate(self, model: Type[SQLAlchemyModel] = None):
+        with self._lock:
+            if model is None:
+                self._counts.clear()
+                self._synced_at.clear()
+            else:
+                self._counts.pop(model, None)
+                self._synced_at.pop(model, None)
+
+    def _add_pending(self, session: Session, model: Type[SQLAlchemyModel], delta: int):
+        if session is None:
+            return
+        pending = session.info.setdefault(PENDING_KEY, dict())
+        pending[model] = pending.get(model, 0) + delta
+
+    def _on_insert(self, mapper, connection, target):
+        self._add_pending(object_session(target), mapper.class_, 1)
+
+    def _on_delete(self, mapper, connection, target):
+        self._add_pending(object_session(target), mapper.class_, -1)
+
+    def _on_orm_execute(self, orm_execute_state):
+        if not (orm_execute_state.is_delete or orm_execute_state.is_insert):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is None or mapper.class_ not in self._models:
+            return
+
+        session = orm_execute_state.session
+        statement = orm_execute_state.statement
+        if orm_execute_state.is_delete and not statement._returning:
+            # * DELETE без RETURNING: выполняем сами и берём к-во удалённых из rowcount
+            result = orm_execute_state.invoke_statement()
+            rowcount = result.rowcount
+            if rowcount is not None and rowcount >= 0:
+                self._add_pending(session, mapper.class_, -rowcount)
+                return result
+            session.info.setdefault(RESYNC_KEY, set()).add(mapper.class_)
+            return result
+
+        # * bulk insert и RETURNING: rowcount не достоверен - перечитаем после commit
+        session.info.setdefault(RESYNC_KEY, set()).add(mapper.class_)
+
+    def _on_commit(self, session: Session):
+        pending = session.info.pop(PENDING_KEY, None)
+        resync = session.info.pop(RESYNC_KEY, None)
+        if pending:
+            with self._lock:
+                for model, delta in pending.items():
+                    # * Ещё не засеянные модели прочитаются из БД целиком
+                    if model in self._counts:
+                        self._counts[model] += delta
+        for model in resync or ():
+            self.invalidate(model)
+
+    def _on_rollback(self, session: Session, previous_transaction):
+        session.info.pop(PENDING_KEY, None)
+        session.info.pop(RESYNC_KEY, None)
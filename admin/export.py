@@ -0,0 +1,90 @@
+from typing import Any, Iterable, Iterator, Optional, Sequence
+import csv
+import io
+import orjson
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _dumps(value: Any) -> bytes:
+    # * display-методы могут вернуть что угодно (например, связанный объект) - отдаём str()
+    return orjson.dumps(value, default=str)
+
+
+def _chunked(parts: Iterable[bytes], size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Склеивает мелкие куски в чанки ~size байт, чтобы не слать по строке за раз"""
+    buffer = []
+    buffered = 0
+    for part in parts:
+        buffer.append(part)
+        buffered += len(part)
+        if buffered >= size:
+            yield b''.join(buffer)
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _json_parts(
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    compact: bool,
+    extra: Optional[dict],
+) -> Iterator[bytes]:
+    yield b'{"columns":' + _dumps(list(columns)) + b',"records":['
+    separator = b''
+    for row in rows:
+        yield separator + _dumps(list(row) if compact else dict(zip(columns, row)))
+        separator = b','
+    yield b']'
+    for key, value in (extra or {}).items():
+        yield b',' + _dumps(key) + b':' + _dumps(value)
+    yield b'}'
+
+
+def json_stream(
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    compact: bool = True,
+    extra: Optional[dict] = None,
+) -> Iterator[bytes]:
+    """
+    Потоковый JSON документ {"columns": [...], "records": [...], **extra}.
+    compact - записи массивами (колонки один раз в заголовке), иначе объектами
+    """
+    return _chunked(_json_parts(columns, rows, compact, extra))
+
+
+def _ndjson_parts(columns: Sequence[str], rows: Iterable[Sequence[Any]], compact: bool) -> Iterator[bytes]:
+    if compact:
+        yield _dumps(list(columns)) + b'\n'
+    for row in rows:
+        yield _dumps(list(row) if compact else dict(zip(columns, row))) + b'\n'
+
+
+def ndjson_stream(columns: Sequence[str], rows: Iterable[Sequence[Any]], compact: bool = True) -> Iterator[bytes]:
+    """
+    NDJSON: по записи на строку.
+    compact - первая строка с именами колонок, дальше массивы значений
+    """
+    return _chunked(_ndjson_parts(columns, rows, compact))
+
+
+def csv_stream(columns: Sequence[str], rows: Iterable[Sequence[Any]], size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    CSV с заголовком из columns. Пишется в небольшой буфер, который
+    сбрасывается каждые ~size байт - память не растёт с размером выборки
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
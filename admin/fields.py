@@ -0,0 +1,135 @@
+import json
+from markupsafe import Markup
+from sqlalchemy import inspect
+from wtforms import Field, ValidationError
+from wtforms.widgets import html_params
+
+from .lookup import coerce_pk, get_label
+
+
+class UnboundSession:
+    """
+    Заглушка сессии для сборки кэшируемого класса формы.
+    Настоящая сессия передаётся инстансу формы: form_class(db_session=session)
+    """
+    def query(self, *args, **kwargs):
+        raise RuntimeError('Form is not bound to a session, pass db_session=... to the form')
+
+    def get(self, *args, **kwargs):
+        raise RuntimeError('Form is not bound to a session, pass db_session=... to the form')
+
+
+UNBOUND_SESSION = UnboundSession()
+
+
+class AutocompleteWidget:
+    """
+    Скрытый input с PK + поле поиска. Варианты подгружает htmx
+    с /admin/<model>/lookup, выбор записывает PK в скрытый input
+    """
+
+    def __call__(self, field: 'AutocompleteField', **kwargs):
+        kwargs.setdefault('id', field.id)
+        field_id = kwargs.pop('id')
+        model_name = field.related_model.__name__.lower()
+        hidden = html_params(type='hidden', id=field_id, name=field.name, value=field._value())
+        search = html_params(
+            type='search',
+            name='q',
+            value=field.display_label(),
+            autocomplete='off',
+            **{
+                'hx-get': f'/admin/{model_name}/lookup',
+                'hx-trigger': 'input changed delay:250ms, focus',
+                'hx-target': f'#{field_id}-options',
+                'hx-vals': json.dumps({'target': field_id, 'blank': int(field.allow_blank)}),
+            },
+            **kwargs
+        )
+        return Markup(
+            f'<input {hidden}>'
+            f'<input {search}>'
+            f'<div id="{field_id}-options" class="list-group"></div>'
+        )
+
+
+class AutocompleteField(Field):
+    """
+    Поле связи many-to-one: в форме хранится PK, data - объект связанной модели
+    (грузится по PK только при обращении), pk_only=True - сам PK (поле-колонка FK).
+    Подпись выбранного значения берётся из admin.lookup.label_cache,
+    варианты - с lookup эндпоинта
+    """
+    widget = AutocompleteWidget()
+
+    def __init__(
+        self,
+        label=None,
+        validators=None,
+        related_model=None,
+        allow_blank=True,
+        pk_only=False,
+        session=None,
+        **kwargs
+    ):
+        super().__init__(label, validators, **kwargs)
+        self.related_model = related_model
+        self.allow_blank = allow_blank
+        self.pk_only = pk_only
+        # * сессию обычно назначает AdminForm при создании инстанса
+        self.session = session if session is not None else UNBOUND_SESSION
+        self._formdata = None
+
+    def _pk_key(self) -> str:
+        return inspect(self.related_model).get_property_by_column(inspect(self.related_model).primary_key[0]).key
+
+    def _formdata_pk(self):
+        try:
+            return coerce_pk(self.related_model, self._formdata)
+        except ValueError:
+            return None
+
+    def _get_data(self):
+        if self._formdata is not None:
+            pk = self._formdata_pk()
+            obj = self.session.get(self.related_model, pk) if pk is not None else None
+            self._set_data(pk if self.pk_only and obj is not None else obj)
+        return self._data
+
+    def _set_data(self, data):
+        self._data = data
+        self._formdata = None
+
+    data = property(_get_data, _set_data)
+
+    def process_formdata(self, valuelist):
+        if valuelist:
+            if valuelist[0] in ('', None):
+                self.data = None
+            else:
+                self._data = None
+                self._formdata = valuelist[0]
+
+    def _value(self) -> str:
+        if self._formdata is not None:
+            return self._formdata
+        if self._data is not None:
+            return str(self._data if self.pk_only else getattr(self._data, self._pk_key()))
+        return ''
+
+    def display_label(self) -> str:
+        """Подпись выбранного значения без загрузки объекта (кэш подписей)"""
+        if self._formdata is not None:
+            pk = self._formdata_pk()
+            label = get_label(self.session, self.related_model, pk) if pk is not None else None
+            return label or ''
+        if self._data is not None:
+            if self.pk_only:
+                return get_label(self.session, self.related_model, self._data) or ''
+            return str(self._data)
+        return ''
+
+    def pre_validate(self, form):
+        submitted = self._formdata is not None
+        if self.data is None and (submitted or not self.allow_blank):
+            raise ValidationError(self.gettext('Not a valid choice.'))
@@ -0,0 +1,141 @@
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, List, Tuple
+from sqlalchemy import and_, inspect, true
+from sqlalchemy.sql import ColumnElement
+
+from .types import SQLAlchemyModel
+
+
+class FilterError(ValueError):
+    """Некорректный фильтр (поле, оператор или значение) - отдаётся как 400"""
+
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    raise ValueError(f'not a boolean: {value!r}')
+
+
+PARSERS: Dict[type, Callable[[str], Any]] = {
+    int: int,
+    float: float,
+    Decimal: Decimal,
+    bool: _parse_bool,
+    date: date.fromisoformat,
+    datetime: datetime.fromisoformat,
+    time: time.fromisoformat,
+}
+
+
+def _value_parser(column) -> Callable[[str], Any]:
+    """Строка из query string -> python-тип колонки (str для неизвестных типов)"""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return str
+    return PARSERS.get(python_type, str)
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    # * 'abc' -> 'abd': col >= 'abc' AND col < 'abd' - диапазон по индексу, в отличие от LIKE
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _startswith(column, value: str) -> ColumnElement:
+    if not value:
+        return true()
+    return and_(column >= value, column < _prefix_upper_bound(value))
+
+
+def _split(value: str) -> List[str]:
+    return [part.strip() for part in value.split(',')]
+
+
+# op -> (как разбирать значение, построитель выражения)
+# value - одно значение типа колонки, list - через запятую, raw - строка как есть, bool - да/нет
+OPERATORS: Dict[str, Tuple[str, Callable[[Any, Any], ColumnElement]]] = {
+    'eq': ('value', lambda col, val: col == val),
+    'ne': ('value', lambda col, val: col != val),
+    'gt': ('value', lambda col, val: col > val),
+    'lt': ('value', lambda col, val: col < val),
+    'gte': ('value', lambda col, val: col >= val),
+    'lte': ('value', lambda col, val: col <= val),
+    'like': ('raw', lambda col, val: col.like(val)),
+    'ilike': ('raw', lambda col, val: col.ilike(val)),
+    'startswith': ('raw', _startswith),
+    'in': ('list', lambda col, val: col.in_(val)),
+    'between': ('list', lambda col, val: col.between(*val)),
+    'isnull': ('bool', lambda col, val: col.is_(None) if val else col.is_not(None)),
+}
+
+
+class CompiledFilter:
+    """
+    Фильтр вида поле__оператор, разобранный один раз: колонка, оператор
+    и функция приведения значения к типу колонки. Вызов со значением
+    из query string возвращает SQL выражение
+    """
+    __slots__ = ('key', 'column', 'op', 'kind', 'parse', 'build')
+
+    def __init__(self, model: SQLAlchemyModel, key: str):
+        field, op = key.split('__', 1) if '__' in key else (key, 'eq')
+        # * поле - ключ атрибута маппера, имя колонки в БД может отличаться
+        prop = inspect(model).column_attrs.get(field)
+        if prop is None:
+            raise FilterError(f'Unknown filter field: {field}')
+        if op not in OPERATORS:
+            raise FilterError(f'Unknown filter operator: {op}')
+
+        self.key = key
+        self.column = getattr(model, field)
+        self.op = op
+        self.kind, self.build = OPERATORS[op]
+        self.parse = _value_parser(prop.columns[0])
+
+    def _coerce(self, value: Any) -> Any:
+        # * уже типизированные значения (вызовы из кода) не трогаем
+        if not isinstance(value, str):
+            return value
+        try:
+            return self.parse(value)
+        except (ValueError, TypeError, InvalidOperation):
+            raise FilterError(f'Invalid value for filter {self.key}: {value!r}')
+
+    def __call__(self, value: Any) -> ColumnElement:
+        if self.kind == 'raw':
+            return self.build(self.column, str(value))
+        if self.kind == 'bool':
+            try:
+                flag = _parse_bool(value) if isinstance(value, str) else bool(value)
+            except ValueError:
+                raise FilterError(f'Invalid value for filter {self.key}: {value!r}')
+            return self.build(self.column, flag)
+        if self.kind == 'list':
+            values = _split(value) if isinstance(value, str) else list(value)
+            if self.op == 'between' and len(values) != 2:
+                raise FilterError(f'Filter {self.key} expects two values: from,to')
+            return self.build(self.column, [self._coerce(v) for v in values])
+        return self.build(self.column, self._coerce(value))
+
+
+# compiled filters: (model, filter key) -> CompiledFilter
+compiled_filters: Dict[Tuple[SQLAlchemyModel, str], CompiledFilter] = dict()
+
+
+def compile_filter(model: SQLAlchemyModel, key: str) -> CompiledFilter:
+    """
+    Фильтр кэшируется на пару (модель, ключ): разбор ключа и выбор приведения
+    зависят только от колонок модели. FilterError для неизвестных полей/операторов
+    """
+    compiled = compiled_filters.get((model, key))
+    if compiled is None:
+        compiled = compiled_filters[(model, key)] = CompiledFilter(model, key)
+    return compiled
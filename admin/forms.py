@@ -1,7 +1,12 @@
+from typing import Dict, Sequence, Tuple, Type
+from sqlalchemy import inspect
 from sqlalchemy.orm import ColumnProperty
-from wtforms_sqlalchemy.orm import ModelConverter
+from wtforms_sqlalchemy.orm import ModelConverter, converts, model_form
 
+from .types import SQLAlchemyModel
+from .utils import AdminForm
 from .validators import Unique
+from .fields import AutocompleteField, UNBOUND_SESSION
 
 
 class MyModelConverter(ModelConverter):
@@ -23,7 +28,47 @@ class MyModelConverter(ModelConverter):
             if getattr(column, 'unique', False):
                 validators = field.kwargs.get('validators', [])
                 if not any(isinstance(v, Unique) for v in validators):
-                    validators.insert(0, Unique(model=model, field=column.name, session=db_session))
+                    session = None if db_session is UNBOUND_SESSION else db_session
+                    validators.insert(0, Unique(model=model, field=column.name, session=session))
                     field.kwargs['validators'] = validators
 
         return field
+
+    @converts('MANYTOONE')
+    def conv_ManyToOne(self, field_args, prop=None, **extra):
+        # * FK - автодополнение вместо select со всеми записями связанной таблицы
+        related_model = prop.mapper.class_
+        if len(inspect(related_model).primary_key) != 1:
+            return super().conv_ManyToOne(field_args, prop=prop, **extra)
+        field_args.pop('query_factory', None)
+        return AutocompleteField(related_model=related_model, **field_args)
+
+
+# cached form classes: (model, exclude, converter class, base class) -> form class
+form_classes: Dict[Tuple[SQLAlchemyModel, frozenset, type, type], Type[AdminForm]] = dict()
+
+
+def model_form_class(
+    model: SQLAlchemyModel,
+    exclude: Sequence[str] = (),
+    converter: ModelConverter = None,
+    base_class: Type[AdminForm] = AdminForm,
+) -> Type[AdminForm]:
+    """
+    Класс формы модели (model_form) собирается один раз и кэшируется.
+    Сессия в класс не запекается - её получает инстанс: form_class(formdata, db_session=session)
+    """
+    converter_class = type(converter) if converter is not None else MyModelConverter
+    key = (model, frozenset(exclude), converter_class, base_class)
+    form_class = form_classes.get(key)
+    if form_class is None:
+        form_class = model_form(
+            model,
+            UNBOUND_SESSION,
+            base_class,
+            exclude=list(exclude),
+            converter=converter or converter_class(),
+        )
+        form_class.model = model
+        form_classes[key] = form_class
+    return form_class
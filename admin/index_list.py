@@ -1,20 +1,175 @@
-from typing import Optional, Sequence, Any, Dict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional, Sequence, Any, Dict, List, Tuple, Union
 from fastapi import Request
-from sqlalchemy import or_, asc, desc, and_
-from sqlalchemy.orm import Query
+from sqlalchemy import or_, asc, desc, and_, inspect, tuple_, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, undefer
 from .types import SQLAlchemyModel
+from .search import SearchIndex
+from .filters import compile_filter
+import base64
+import json
 
 
-OPERATORS = {
-    "eq": lambda col, val: col == val,
-    "gt": lambda col, val: col > val,
-    "lt": lambda col, val: col < val,
-    "gte": lambda col, val: col >= val,
-    "lte": lambda col, val: col <= val,
-    "like": lambda col, val: col.like(val),
-    "ilike": lambda col, val: col.ilike(val),
-    "ne": lambda col, val: col != val,
-}
+class KeysetPage(list):
+    """Страница keyset-пагинации: записи + непрозрачные курсоры соседних страниц"""
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} can not be stored in cursor')
+
+
+def encode_cursor(values: Sequence[Any], direction: str = 'next') -> str:
+    """Упаковывает значения ключа сортировки последней/первой записи в курсор"""
+    payload = json.dumps({'d': direction, 'v': list(values)}, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, list]:
+    """Распаковывает курсор в (направление, значения). ValueError если курсор битый"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        direction, values = payload['d'], payload['v']
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    return direction, values
+
+
+def _coerce_cursor_value(column, value):
+    # * даты в курсоре лежат строкой isoformat - вернём им исходный тип
+    if not isinstance(value, str):
+        return value
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return value
+
+
+def _keyset_keys(model: SQLAlchemyModel, order: Optional[str]) -> List[Any]:
+    """
+    Колонки ключа keyset-пагинации: колонка сортировки + PK как тай-брейкер,
+    чтобы порядок был строгим даже при одинаковых значениях колонки сортировки
+    """
+    mapper = inspect(model)
+    keys = [getattr(model, mapper.get_property_by_column(c).key) for c in mapper.primary_key]
+    if order and order in mapper.column_attrs and not any(k.key == order for k in keys):
+        keys.insert(0, getattr(model, order))
+    return keys
+
+
+def _nullable(key) -> bool:
+    return any(column.nullable for column in key.property.columns)
+
+
+def _keyset_after(keys: List[Any], values: list, forward: bool):
+    """
+    Строки после (forward) / до курсора при NULL в колонке сортировки:
+    (k, pk) > (:v, :pk) с NULL никогда не истинно, поэтому условие раскрывается по колонкам.
+    NULL идут первыми по возрастанию (и последними по убыванию)
+    """
+    key, value = keys[0], values[0]
+    if len(keys) == 1:
+        return key > value if forward else key < value
+
+    rest = _keyset_after(keys[1:], values[1:], forward)
+    if value is None:
+        if forward:
+            return or_(and_(key.is_(None), rest), key.is_not(None))
+        return and_(key.is_(None), rest)
+    if forward:
+        return or_(key > value, and_(key == value, rest))
+    return or_(key < value, key.is_(None), and_(key == value, rest))
+
+
+def _keyset_query(
+    model: SQLAlchemyModel,
+    query: Union[Query, Select],
+    limit: int,
+    cursor: str = '',
+    order: Optional[str] = None,
+    order_type: Optional[str] = None,
+) -> Tuple[Union[Query, Select], List[Any], bool]:
+    """Накладывает на запрос условие и сортировку keyset-страницы"""
+    keys = _keyset_keys(model, order)
+    descending = order_type == 'desc'
+    direction = 'next'
+
+    if cursor:
+        direction, values = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise ValueError(f'Invalid cursor: {cursor}')
+        values = [_coerce_cursor_value(k, v) for k, v in zip(keys, values)]
+        # * Назад - это вперёд по обратному порядку
+        forward = (direction == 'next') != descending
+        if any(_nullable(k) for k in keys):
+            query = query.filter(_keyset_after(keys, values, forward))
+        else:
+            query = query.filter(tuple_(*keys) > tuple_(*values) if forward else tuple_(*keys) < tuple_(*values))
+
+    backward = direction == 'prev'
+    reverse = descending != backward
+    ordering = [desc(k) if reverse else asc(k) for k in keys]
+    # * порядок NULL задаём явно - он должен совпадать с _keyset_after на любой СУБД
+    ordering = [
+        (o.nulls_last() if reverse else o.nulls_first()) if _nullable(k) else o
+        for o, k in zip(ordering, keys)
+    ]
+    query = query.order_by(*ordering)
+    # * курсор читает ключи из строк: они должны быть загружены даже при load_only,
+    # * иначе ленивая догрузка (в async - MissingGreenlet)
+    query = query.options(*[undefer(k) for k in keys])
+
+    return query.limit(limit + 1), keys, backward
+
+
+def _keyset_page(rows: list, keys: List[Any], limit: int, backward: bool, cursor: str) -> KeysetPage:
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+
+    page = KeysetPage(rows)
+    if rows:
+        # * Назад пришли со следующей страницы, вперёд - с предыдущей (если был курсор)
+        has_next = backward or has_more
+        has_prev = has_more if backward else bool(cursor)
+        if has_next:
+            page.next_cursor = encode_cursor([getattr(rows[-1], k.key) for k in keys], 'next')
+        if has_prev:
+            page.prev_cursor = encode_cursor([getattr(rows[0], k.key) for k in keys], 'prev')
+    return page
+
+
+def keyset_list(
+    model: SQLAlchemyModel,
+    query: Query,
+    limit: int,
+    cursor: str = '',
+    order: Optional[str] = None,
+    order_type: Optional[str] = None,
+) -> KeysetPage:
+    """
+    Keyset (cursor) пагинация: WHERE (order_col, pk) > (:last_val, :last_pk)
+    вместо OFFSET, поэтому глубокие страницы стоят столько же, сколько первая.
+    Пустой cursor - первая страница. NULL в колонке сортировки идут первыми по возрастанию.
+    """
+    query, keys, backward = _keyset_query(model, query, limit, cursor, order, order_type)
+    return _keyset_page(query.all(), keys, limit, backward, cursor)
 
 
 def parse_filters(request: Request) -> Dict[str, Any]:
@@ -26,34 +181,28 @@ def parse_filters(request: Request) -> Dict[str, Any]:
     return filters
 
 
-def index_list(
-    request: Request,
-    model: SQLAlchemyModel,  # SQLAlchemy ORM model class
+def filter_query(
+    model: SQLAlchemyModel,
     queryset: Query,
     search_column_names: Sequence[str],
-    offset: int = 0,
-    limit: int = 8,
     search: Optional[str] = None,
-    order: Optional[str] = None,
-    order_type: Optional[str] = None,
-    filters: Optional[Dict[str, Any]] = None  # 👈 фильтры по полям
-) -> list:
+    filters: Optional[Dict[str, Any]] = None,
+    search_index: Optional[SearchIndex] = None,
+) -> Query:
     """
-    Уиверсальная функция для отфильтровки и получения данных из БД
+    Накладывает на queryset фильтры по полям и поиск.
+    search_index - FTS5 индекс модели (SQLite), без него поиск через ILIKE
     """
-    
+
     query = queryset
 
-    # Фильтрация по конкретным полям
-    for raw_key, value in filters.items():
-        if "__" in raw_key:
-            field, op = raw_key.split("__", 1)
-        else:
-            field, op = raw_key, "eq"
+    # Фильтрация по конкретным полям (FilterError для неизвестных полей / плохих значений)
+    for raw_key, value in (filters or {}).items():
+        query = query.filter(compile_filter(model, raw_key)(value))
 
-        if field in model.__table__.columns and op in OPERATORS:
-            column = getattr(model, field)
-            query = query.filter(OPERATORS[op](column, value))
+    # Полнотекстовый поиск через FTS таблицу
+    if search and search_index is not None:
+        return search_index.apply(query, search)
 
     # Поиск по строке (LIKE %search%)
     if search:
@@ -65,10 +214,113 @@ def index_list(
         if search_clauses:
             query = query.filter(or_(*search_clauses))
 
+    return query
+
+
+def index_query(
+    model: SQLAlchemyModel,
+    queryset: Query,
+    search_column_names: Sequence[str],
+    offset: int = 0,
+    limit: Optional[int] = 8,
+    search: Optional[str] = None,
+    order: Optional[str] = None,
+    order_type: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    search_index: Optional[SearchIndex] = None,
+) -> Query:
+    """
+    Тот же запрос что и в index_list, но без выполнения -
+    для потоковой выдачи (yield_per). limit=None - без лимита
+    """
+    query = filter_query(
+        model, queryset, search_column_names,
+        search=search, filters=filters, search_index=search_index
+    )
+
     # Сортировка
     if order and hasattr(model, order):
         column = getattr(model, order)
         query = query.order_by(desc(column) if order_type == 'desc' else asc(column))
+    elif search and search_index is not None and search_index.match_query(search) is not None:
+        # * без явной сортировки - по релевантности FTS (bm25)
+        query = query.order_by(search_index.rank_clause())
 
     # Лимит и оффсет
-    return query.offset(offset).limit(limit).all()
+    return query.offset(offset).limit(limit)
+
+
+def index_list(
+    request: Request,
+    model: SQLAlchemyModel,  # SQLAlchemy ORM model class
+    queryset: Query,
+    search_column_names: Sequence[str],
+    offset: int = 0,
+    limit: int = 8,
+    search: Optional[str] = None,
+    order: Optional[str] = None,
+    order_type: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,  # 👈 фильтры по полям
+    cursor: Optional[str] = None,
+    search_index: Optional[SearchIndex] = None,
+) -> list:
+    """
+    Уиверсальная функция для отфильтровки и получения данных из БД
+
+    cursor != None включает keyset-пагинацию (offset игнорируется),
+    тогда возвращается KeysetPage с next_cursor / prev_cursor
+    """
+
+    # Keyset пагинация
+    if cursor is not None:
+        query = filter_query(
+            model, queryset, search_column_names,
+            search=search, filters=filters, search_index=search_index
+        )
+        return keyset_list(model, query, limit, cursor=cursor, order=order, order_type=order_type)
+
+    return index_query(
+        model, queryset, search_column_names,
+        offset=offset, limit=limit, search=search,
+        order=order, order_type=order_type, filters=filters,
+        search_index=search_index
+    ).all()
+
+
+async def index_list_async(
+    request: Request,
+    model: SQLAlchemyModel,
+    session: AsyncSession,
+    statement: Select,
+    search_column_names: Sequence[str],
+    offset: int = 0,
+    limit: int = 8,
+    search: Optional[str] = None,
+    order: Optional[str] = None,
+    order_type: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    cursor: Optional[str] = None,
+    search_index: Optional[SearchIndex] = None,
+) -> list:
+    """
+    Async вариант index_list: те же фильтры, поиск, сортировка и пагинация,
+    но над select() и AsyncSession - запрос не блокирует event loop
+    """
+
+    # Keyset пагинация
+    if cursor is not None:
+        statement = filter_query(
+            model, statement, search_column_names,
+            search=search, filters=filters, search_index=search_index
+        )
+        statement, keys, backward = _keyset_query(model, statement, limit, cursor, order, order_type)
+        rows = list((await session.scalars(statement)).all())
+        return _keyset_page(rows, keys, limit, backward, cursor)
+
+    statement = index_query(
+        model, statement, search_column_names,
+        offset=offset, limit=limit, search=search,
+        order=order, order_type=order_type, filters=filters,
+        search_index=search_index
+    )
+    return list((await session.scalars(statement)).all())
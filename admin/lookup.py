@@ -0,0 +1,82 @@
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import inspect, or_
+from sqlalchemy.orm import Session
+
+from .types import SQLAlchemyModel
+from .cache import ResultCache, model_tables, table_versions
+from .filters import compile_filter, _value_parser
+from . import settings
+
+
+# cached labels of selected values: (model, pk, table versions) -> str
+label_cache = ResultCache(max_entries=settings.get_setting('lookup', 'label_cache_size'))
+
+
+def _pk_column(model: SQLAlchemyModel):
+    # * автодополнение работает с одноколоночным PK (значение скрытого input)
+    return inspect(model).primary_key[0]
+
+
+def coerce_pk(model: SQLAlchemyModel, value: Any) -> Any:
+    """Строка из формы -> python-тип PK; ValueError если не приводится"""
+    if not isinstance(value, str):
+        return value
+    return _value_parser(_pk_column(model))(value)
+
+
+def _label_key(model: SQLAlchemyModel, pk: Any) -> tuple:
+    return (model, pk, table_versions.get(model_tables(model)))
+
+
+def remember_label(model: SQLAlchemyModel, pk: Any, label: str):
+    label_cache.set(_label_key(model, pk), label, len(label))
+
+
+def get_label(session: Session, model: SQLAlchemyModel, pk: Any) -> Optional[str]:
+    """
+    str() записи по PK. Кэшируется до записи в таблицу модели, поэтому
+    повторный рендер формы с выбранным значением не ходит в БД
+    """
+    key = _label_key(model, pk)
+    label = label_cache.get(key)
+    if label is None:
+        obj = session.get(model, pk)
+        if obj is None:
+            return None
+        label = str(obj)
+        label_cache.set(key, label, len(label))
+    return label
+
+
+def lookup(
+    session: Session,
+    model: SQLAlchemyModel,
+    columns: Sequence[str],
+    search: str = '',
+    limit: int = 10,
+) -> List[Tuple[str, str]]:
+    """
+    Варианты для автодополнения: [(pk, label)], не больше limit.
+    Поиск по префиксу колонок (startswith - диапазон, идёт по индексу)
+    и по точному PK, если строка приводится к его типу
+    """
+    pk = _pk_column(model)
+    pk_attribute = getattr(model, inspect(model).get_property_by_column(pk).key)
+    query = session.query(model)
+
+    search = search.strip()
+    if search:
+        clauses = [compile_filter(model, f'{column}__startswith')(search) for column in columns]
+        try:
+            clauses.append(pk_attribute == coerce_pk(model, search))
+        except ValueError:
+            pass
+        query = query.filter(or_(*clauses))
+
+    order_by = getattr(model, columns[0]) if columns else pk_attribute
+    options = list()
+    for obj in query.order_by(order_by, pk_attribute).limit(limit):
+        value, label = getattr(obj, pk_attribute.key), str(obj)
+        remember_label(model, value, label)
+        options.append((str(value), label))
+    return options
@@ -0,0 +1,236 @@
+"""
+Метрики админки в формате Prometheus (/admin/_metrics), всё считается в процессе.
+
+Горячий путь без блокировок: каждый поток пишет в свой шард (threading.local),
+шарды суммируются только при чтении метрик. Async роуты живут в одном потоке
+event loop, так что шардов немного: loop + потоки threadpool.
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+from sqlalchemy import Engine, event
+
+from .cache import list_cache
+from .lookup import label_cache
+from .templating import fragment_cache
+from . import profiling
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# * время начала SQL - на контексте выполнения: он свой у каждого запроса и не
+# * переживает ошибку (стек в conn.info рос бы на пуловом соединении при каждой ошибке)
+START_ATTR = '_admin_metrics_start'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+Labels = Tuple[str, ...]
+
+
+class _Metric:
+    """Общая часть: шарды по потокам, регистрация шарда - один раз на поток"""
+    type = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, 'data', None)
+        if shard is None:
+            shard = self._local.data = dict()
+            # * list.append атомарен под GIL
+            self._shards.append(shard)
+        return shard
+
+    def _labels(self, labels: Labels, **extra) -> str:
+        pairs = list(zip(self.labelnames, labels)) + list(extra.items())
+        if not pairs:
+            return ''
+        escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in pairs]
+        return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+    def _header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        merged = dict()
+        for shard in list(self._shards):
+            for labels, value in list(shard.items()):
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+    def expose(self) -> List[str]:
+        lines = self._header()
+        for labels, value in sorted(self.values().items()):
+            lines.append(f'{self.name}{self._labels(labels)} {value:g}')
+        return lines
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str):
+        shard = self._shard()
+        data = shard.get(labels)
+        if data is None:
+            # * [к-во по корзинам..., +Inf], сумма, к-во
+            data = shard[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        data[0][bisect.bisect_left(self.buckets, value)] += 1
+        data[1] += value
+        data[2] += 1
+
+    def values(self) -> Dict[Labels, list]:
+        merged = dict()
+        for shard in list(self._shards):
+            for labels, (counts, total, count) in list(shard.items()):
+                target = merged.setdefault(labels, [[0] * len(counts), 0.0, 0])
+                target[0] = [a + b for a, b in zip(target[0], counts)]
+                target[1] += total
+                target[2] += count
+        return merged
+
+    def expose(self) -> List[str]:
+        lines = self._header()
+        for labels, (counts, total, count) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{self._labels(labels, le=bound)} {cumulative}')
+            lines.append(f'{self.name}_sum{self._labels(labels)} {total:g}')
+            lines.append(f'{self.name}_count{self._labels(labels)} {count}')
+        return lines
+
+
+class Gauge(_Metric):
+    """Значения читаются функцией в момент выдачи метрик (размеры кэшей, hit rate)"""
+    type = 'gauge'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], collect: Callable[[], Iterable[Tuple[Labels, float]]]):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def expose(self) -> List[str]:
+        lines = self._header()
+        for labels, value in self.collect():
+            lines.append(f'{self.name}{self._labels(labels)} {value:g}')
+        return lines
+
+
+# * кэши админки, которые считают попадания: name -> ResultCache
+CACHES = {
+    'list': list_cache,
+    'lookup_label': label_cache,
+    'fragment': fragment_cache,
+}
+
+
+def _cache_stats() -> Iterable[Tuple[Labels, float]]:
+    for name, cache in CACHES.items():
+        yield (name, 'hits'), cache.hits
+        yield (name, 'misses'), cache.misses
+        yield (name, 'entries'), len(cache)
+        yield (name, 'bytes'), cache.size_bytes
+
+
+def _cache_hit_ratio() -> Iterable[Tuple[Labels, float]]:
+    for name, cache in CACHES.items():
+        total = cache.hits + cache.misses
+        yield (name,), cache.hits / total if total else 0
+
+
+request_duration = Histogram(
+    'admin_request_duration_seconds', 'HTTP request latency by route', ('route',)
+)
+requests_total = Counter(
+    'admin_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status')
+)
+db_statement_duration = Histogram(
+    'admin_db_statement_duration_seconds', 'SQL statement execution time', ()
+)
+template_render_duration = Histogram(
+    'admin_template_render_duration_seconds', 'Jinja template render time', ()
+)
+cache_stats = Gauge('admin_cache', 'Admin cache counters and sizes', ('cache', 'stat'), _cache_stats)
+cache_hit_ratio = Gauge('admin_cache_hit_ratio', 'Admin cache hit ratio', ('cache',), _cache_hit_ratio)
+
+METRICS = [
+    request_duration, requests_total, db_statement_duration,
+    template_render_duration, cache_stats, cache_hit_ratio,
+]
+
+
+def expose() -> str:
+    """Все метрики в текстовом формате Prometheus"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.expose())
+    return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        setattr(context, START_ATTR, time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, START_ATTR, None)
+    if started is not None:
+        db_statement_duration.observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine):
+    """Время и к-во SQL (count гистограммы) с движка; для AsyncEngine - .sync_engine"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def install_template_timing():
+    if template_render_duration.observe not in profiling.template_listeners:
+        profiling.template_listeners.append(template_render_duration.observe)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: латентность и статус по имени роута (scope['route'] ставит FastAPI)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            name = getattr(route, 'name', None) or 'unmatched'
+            request_duration.observe(time.perf_counter() - started, name)
+            requests_total.inc(name, scope['method'], str(status))
@@ -1,19 +1,156 @@
 from types import MethodType
-from typing import Dict, List, Tuple, Type
-from sqlalchemy import inspect
-from sqlalchemy.orm import Query
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type, Union
+from sqlalchemy import inspect, select, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, joinedload, load_only, selectinload
 from sqlalchemy.orm import Session
-from fastapi import Request
+from fastapi import Request, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+import base64
+import binascii
 import functools
 import json
+import operator
 
 from .types import SQLAlchemyModel
-from .index_list import index_list, parse_filters
+from .index_list import index_list, index_list_async, index_query, parse_filters
+from .export import csv_stream, json_stream, ndjson_stream
+from .search import SearchIndex, get_index
+from .cache import estimate_size, list_cache, model_tables, scalar_values, table_versions
+from .lookup import lookup
+from .templating import render_stream
+from . import settings
 
 
-class RecordValues(list):
-    ...
+YIELD_PER = 500
+
+
+class RowKey:
+    """
+    Первичный ключ строк списка, выводится из маппера один раз на план (в т.ч. составной).
+    JSON - {колонка PK: значение} в порядке колонок (delete / bulk-delete читают его так же)
+    """
+    __slots__ = ('names', 'getter')
+
+    def __init__(self, mapper):
+        columns = mapper.primary_key
+        self.names = tuple([column.name for column in columns])
+        getter = operator.attrgetter(*[mapper.get_property_by_column(column).key for column in columns])
+        self.getter = getter if len(columns) > 1 else (lambda obj: (getter(obj),))
+
+    def dom_id(self, values: Tuple[Any, ...]) -> str:
+        """
+        Часть HTML id (и CSS-селектора hx-target): одиночный целый PK как есть,
+        иначе 'k' + url-safe base64 от JSON ключа - однозначно и только [A-Za-z0-9_-]
+        """
+        if len(values) == 1 and isinstance(values[0], int):
+            return str(values[0])
+        encoded = base64.urlsafe_b64encode(json.dumps(list(values), default=str).encode())
+        return 'k' + encoded.decode().rstrip('=')
+
+    def parse(self, token: str) -> Tuple[Any, ...]:
+        """Обратно к dom_id / path: значения PK; ValueError - не ключ этой модели"""
+        if not token.startswith('k'):
+            return (int(token),)
+        encoded = token[1:]
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+        except (TypeError, binascii.Error, UnicodeDecodeError) as e:
+            raise ValueError(f'invalid key: {token!r}') from e
+        if not isinstance(values, list) or len(values) != len(self.names):
+            raise ValueError(f'invalid key: {token!r}')
+        return tuple(values)
+
+    def json(self, values: Tuple[Any, ...]) -> str:
+        return json.dumps(dict(zip(self.names, values)))
+
+    def path(self, values: Tuple[Any, ...]) -> str:
+        """
+        Сегмент URL - то же кодирование, что dom_id: Starlette раскодирует %2F / %2C
+        до роута, поэтому экранированные значения через запятую неоднозначны
+        """
+        return self.dom_id(values)
+
+
+class Record:
+    """
+    Строка списка: значения колонок (итерируется в шаблоне) и значения PK.
+    ids / pks / path кодируются лениво - только если шаблон их спросил
+    """
+    __slots__ = ('values', 'key', 'row_key', '_pks')
+
+    def __init__(self, values: Sequence[Any], key: Tuple[Any, ...], row_key: RowKey):
+        self.values = values
+        self.key = key
+        self.row_key = row_key
+        self._pks = None
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def ids(self) -> str:
+        return self.row_key.dom_id(self.key)
+
+    @property
+    def pks(self) -> str:
+        if self._pks is None:
+            self._pks = self.row_key.json(self.key)
+        return self._pks
+
+    @property
+    def path(self) -> str:
+        return self.row_key.path(self.key)
+
+
+class DisplayPlan:
+    """
+    Скомпилированный list_display: заголовки колонок и функции получения значений.
+    Для обычных колонок - operator.attrgetter, для get_<column>_display - функция класса
+    """
+    __slots__ = ('names', 'headers', 'functions', 'custom', 'load_columns', 'prefetch', 'row_key')
+
+    def __init__(
+        self,
+        names: List[str],
+        headers: List[str],
+        functions: List[Callable],
+        custom: List[bool],
+        load_columns: Optional[List[str]] = None,
+        prefetch: Sequence[str] = (),
+        row_key: Optional[RowKey] = None,
+    ):
+        self.names = names
+        self.headers = headers
+        self.functions = functions
+        self.custom = custom
+        # * колонки, которые нужно загрузить для списка; None - объект целиком
+        self.load_columns = load_columns
+        # * связи (пути через точку), загружаемые заранее - без N+1 при рендере
+        self.prefetch = prefetch
+        self.row_key = row_key
+
+    def bind(self, model_admin: 'ModelAdmin') -> Callable[[Any], Sequence[Any]]:
+        if not any(self.custom):
+            # * одна C-функция на всю строку
+            getter = operator.attrgetter(*self.names)
+            if len(self.names) == 1:
+                return lambda obj: (getter(obj),)
+            return getter
+
+        getters = tuple([
+            MethodType(function, model_admin) if is_custom else function
+            for function, is_custom in zip(self.functions, self.custom)
+        ])
+        return lambda obj: tuple([getter(obj) for getter in getters])
+
+
+# cached display plans: (ModelAdmin class, model) -> DisplayPlan
+display_plans: Dict[Tuple[type, SQLAlchemyModel], DisplayPlan] = dict()
 
 
 class ModelAdmin:
@@ -21,6 +158,17 @@ class ModelAdmin:
     fields = '__all__'
     exclude_fields = []
     search_columns = []
+    # * колонки, по которым фильтруют список (filters[...]) - для советника по индексам
+    list_filter = []
+    # * грузить в списке только колонки нужные list_display (load_only)
+    list_projection = True
+    # * поиск по search_columns через FTS5 shadow-таблицу (SQLite), иначе ILIKE
+    search_fts = False
+    # * кэшировать готовые страницы списка (cache.list_cache): сброс - запись в таблицы модели в этом
+    # * процессе, иначе через list_cache.ttl. Только если выборка не зависит от request (пользователь, тенант)
+    cache_list = False
+    # * потоковый рендер списка (Template.generate + StreamingResponse), переключается ?stream=1/0
+    stream_list = False
 
     def __init__(self, model: SQLAlchemyModel):
         self.model = model
@@ -28,6 +176,10 @@ class ModelAdmin:
 
     def get_queryset(self, request: Request, session: Session) -> Query:
         return session.query(self.model)
+
+    def get_statement(self, request: Request) -> Select:
+        """Аналог get_queryset для async пути (AsyncSession)"""
+        return select(self.model)
     
     def get_name(self) -> str:
         return self.model.__class__.__name__
@@ -36,8 +188,9 @@ class ModelAdmin:
         return self.model.__class__.__name__
     
     def _sql_columns(self) -> list[str]:
+        """Колонки модели - ключи атрибутов маппера (имя колонки в БД может отличаться)"""
         inspected_model = inspect(self.model)
-        return list([k.name for k in inspected_model.columns])
+        return list(inspected_model.columns.keys())
     
     def _display_columns(self) -> list[str]:
         """Returns actual list of list_display"""
@@ -61,95 +214,409 @@ class ModelAdmin:
             error_msg = f'The list_display attribute of a {self.name} must return list or str'
             raise ValueError(error_msg)
     
-    def _generate_display_func(self, column):
-        def generated_display_method(self, obj):
-                return getattr(obj, f'{column}')
-        yield generated_display_method
-
-
-    def _display_methods(self):
+    def _compile_display_plan(self) -> 'DisplayPlan':
         """
         Формирует:
-        Методы возвращающий значание для колонки (Column) +
+        Функции возвращающие значание для колонки (Column) +
         описание некоторых свойств отобрадения
         """
-        display_methods = []
         sql_columns = self._sql_columns()
-        display_columns = self._display_columns()
-        search_columns = []
-        
-        for column in display_columns:
-            display_method = getattr(self, f'get_{column}_display', None)
+        mapper = inspect(self.model)
+        relationships = mapper.relationships
+        names, headers, functions, custom = [], [], [], []
+        # * load_columns - ключи атрибутов (для load_only), не имена колонок в БД
+        load_columns = [mapper.get_property_by_column(c).key for c in mapper.primary_key]
+        prefetch = []
+        full_object = not self.list_projection
+
+        for column in self._display_columns():
+            display_method = getattr(type(self), f'get_{column}_display', None)
 
             if display_method:
-                if not hasattr(display_method.__func__, 'display'):
-                    setattr(display_method.__func__, 'display', column)
-                display_methods.append(display_method)
+                functions.append(display_method)
+                custom.append(True)
+                # * display-метод может объявить нужные ему колонки: @display(columns=(...))
+                # * или отказаться от проекции: @display(full_object=True)
+                full_object = full_object or getattr(display_method, 'full_object', False)
+                declared = getattr(display_method, 'columns', None)
+                if declared is not None:
+                    load_columns.extend(declared)
+                elif column in sql_columns:
+                    load_columns.append(column)
+                # * связи, которые читает метод: @display(prefetch=('author',))
+                prefetch.extend(getattr(display_method, 'prefetch', ()))
             elif column in sql_columns:
-                generated_display_func = next(self._generate_display_func(column))
-                generated_display_func.display = column
-                bound_generated_display_method = MethodType(generated_display_func, self)
-                setattr(self, f'get_{column}_display', bound_generated_display_method)
-                display_methods.append(bound_generated_display_method)
+                functions.append(operator.attrgetter(column))
+                custom.append(False)
+                load_columns.append(column)
+            elif column in relationships:
+                # * связь прямо в list_display - выводится str() связанного объекта
+                functions.append(operator.attrgetter(column))
+                custom.append(False)
+                prefetch.append(column)
             else:
                 error_msg = f'column {column} not in DB table.'
                 raise ValueError(error_msg)
-                
-        return display_methods
-    
-    
+
+            names.append(column)
+            headers.append(getattr(display_method, 'display', column))
+
+        prefetch = list(dict.fromkeys(prefetch))
+        for path in prefetch:
+            # * связи нужны её локальные колонки (FK для many-to-one)
+            relationship = self._relationship_path(path)[0]
+            load_columns.extend(mapper.get_property_by_column(c).key for c in relationship.local_columns)
+
+        if full_object:
+            load_columns = None
+        else:
+            load_columns = list(dict.fromkeys(load_columns))
+
+        return DisplayPlan(names, headers, functions, custom, load_columns, prefetch, RowKey(inspect(self.model)))
+
+    def _relationship_path(self, path: str) -> list:
+        """'author.posts' -> [RelationshipProperty, ...]; ValueError для неизвестных связей"""
+        mapper = inspect(self.model)
+        relationships = []
+        for name in path.split('.'):
+            relationship = mapper.relationships.get(name)
+            if relationship is None:
+                raise ValueError(f'relationship {name} (prefetch {path}) not in {mapper.class_.__name__}')
+            relationships.append(relationship)
+            mapper = relationship.mapper
+        return relationships
+
+    @property
+    def display_plan(self) -> 'DisplayPlan':
+        """План отображения компилируется один раз на пару (класс ModelAdmin, модель)"""
+        key = (type(self), self.model)
+        plan = display_plans.get(key)
+        if plan is None:
+            plan = display_plans[key] = self._compile_display_plan()
+        return plan
+
+    @functools.cached_property
+    def row_getter(self) -> Callable[[Any], Sequence[Any]]:
+        """obj -> значения колонок list_display (план + привязка к этому инстансу)"""
+        return self.display_plan.bind(self)
+
+    def _prefetch_option(self, path: str):
+        """
+        Опция загрузки пути связей: many-to-one - joinedload (тот же запрос),
+        коллекции - selectinload (один доп. запрос на страницу, без размножения строк)
+        """
+        option = None
+        for relationship in self._relationship_path(path):
+            attribute = getattr(relationship.parent.class_, relationship.key)
+            loader = selectinload if relationship.uselist else joinedload
+            option = loader(attribute) if option is None else getattr(option, loader.__name__)(attribute)
+        return option
+
+    def _list_options(self) -> list:
+        plan = self.display_plan
+        options = [self._prefetch_option(path) for path in plan.prefetch]
+        if plan.load_columns is not None:
+            options.append(load_only(*[getattr(self.model, c) for c in plan.load_columns]))
+        return options
+
+    def get_list_queryset(self, request: Request, session: Session) -> Query:
+        """get_queryset + проекция на колонки из плана отображения"""
+        return self.get_queryset(request, session).options(*self._list_options())
+
+    def get_list_statement(self, request: Request) -> Select:
+        """get_statement + проекция на колонки из плана отображения"""
+        return self.get_statement(request).options(*self._list_options())
+
+    def _list_params(self, request: Request, default_limit: int = 1000) -> dict:
+        """Параметры списка из query string: offset, limit, search, order, фильтры, cursor"""
+        try:
+            offset = max(0, int(request.query_params.get('offset', default=0)))
+            limit = max(1, int(request.query_params.get('limit', default=default_limit)))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return {
+            'offset': offset,
+            'limit': limit,
+            'search': request.query_params.get('search', default=None),
+            'order': request.query_params.get('order', default=None),
+            'order_type': request.query_params.get('order_type', default='asc'),
+            'filters': parse_filters(request=request),
+            'cursor': request.query_params.get('cursor', default=None),
+        }
+
+    def get_search_index(self, session: Union[Session, AsyncSession]) -> Optional[SearchIndex]:
+        """FTS индекс модели, если он включён (search_fts) и БД - SQLite"""
+        if not self.search_fts or session.get_bind().dialect.name != 'sqlite':
+            return None
+        return get_index(self.model)
+
+    def _index_list(self, request: Request, session: Session, params: dict) -> list:
+        try:
+            return index_list(
+                request=request,
+                model=self.model,
+                queryset=self.get_list_queryset(request, session),
+                search_column_names=self.search_columns,
+                search_index=self.get_search_index(session),
+                **params
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    def _stream_query(self, request: Request, session: Session, params: dict) -> Query:
+        """index_query для потоковой выдачи: записи читаются порциями по YIELD_PER"""
+        try:
+            query = index_query(
+                self.model,
+                self.get_list_queryset(request, session),
+                self.search_columns,
+                search_index=self.get_search_index(session),
+                **params
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return query.yield_per(YIELD_PER)
+
+    def _iter_records(self, db_records) -> Iterator[Record]:
+        row_getter = self.row_getter
+        row_key = self.display_plan.row_key
+        key_getter = row_key.getter
+        for db_record in db_records:
+            yield Record(row_getter(db_record), key_getter(db_record), row_key)
+
+    def _records(self, db_records: list) -> list:
+        return list(self._iter_records(db_records))
+
+    def _index_context(self, page: tuple) -> dict:
+        records, next_cursor, prev_cursor = page
+        return {
+            'columns': self.display_plan.headers,
+            'records': records,
+            'model': self.model.__name__.capitalize(),
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+        }
+
+    @functools.cached_property
+    def _cache_tables(self) -> Tuple[str, ...]:
+        return model_tables(self.model)
+
+    def _list_cache_key(self, params: dict, search_index: Optional[SearchIndex]) -> Optional[tuple]:
+        """
+        Ключ страницы в list_cache: параметры ровно в том виде, в каком их получает
+        запрос (без нормализации - иначе разные выборки делят одну запись) + версии таблиц.
+        Версии читаются до запроса - запись во время чтения сделает ключ устаревшим
+        """
+        if not self.cache_list:
+            return None
+        key_params = dict(params, filters=tuple(sorted(params['filters'].items())))
+        return (
+            type(self),
+            self.model,
+            table_versions.get(self._cache_tables),
+            search_index is not None,
+            tuple(sorted(key_params.items())),
+        )
+
+    def _cache_page(self, key: Optional[tuple], db_records: list, records: List[Record]) -> tuple:
+        if key is not None:
+            # * в кэш - только отрендеренные значения, без ORM объектов
+            records = list([Record(scalar_values(r.values), r.key, r.row_key) for r in records])
+        page = (records, getattr(db_records, 'next_cursor', None), getattr(db_records, 'prev_cursor', None))
+        if key is not None:
+            list_cache.set(key, page, estimate_size(records))
+        return page
+
+    def _list_stream(self, request: Request, params: dict) -> bool:
+        """
+        Потоковый рендер: stream=1/0 в query string, по умолчанию - stream_list.
+        Keyset-страницы (cursor) рендерятся целиком - курсоры известны только после выборки
+        """
+        stream = request.query_params.get('stream')
+        enabled = self.stream_list if stream is None else stream not in ('0', 'false')
+        return enabled and params['cursor'] is None
+
+    def _stream_context(self, db_records) -> dict:
+        return self._index_context((self._iter_records(db_records), None, None))
+
     def index_view(self, templating: Jinja2Templates, request: Request, session: Session) -> dict:
         """Render a html page list of records"""
         
-        display_methods = self._display_methods()
-
-        offset = request.query_params.get('offset', default=0)
-        limit = request.query_params.get('limit', default=1000)
-        limit = max(1, int(limit))
-        search = request.query_params.get('search', default=None)
-        order = request.query_params.get('order', default=None)
-        order_type = request.query_params.get('order_type', default='asc')
-        filters = parse_filters(request=request)
-
-        db_records = index_list(
-            request=request,
-            model=self.model,
-            queryset=self.get_queryset(request, session),
-            search_column_names=self.search_columns,
-            offset=offset,
-            limit=limit,
-            search=search,
-            order=order,
-            order_type=order_type,
-            filters=filters
-        )
-        records = list()
-        for db_record in db_records:
-            values = RecordValues()
-            for display_method in display_methods:
-                values.append(display_method(db_record))
-            setattr(values, 'ids', f'{db_record.id}')
-            setattr(values, 'pks', json.dumps({'id': db_record.id}))
-            records.append(values)
-
-        context= {
-            'columns': list([c.display for c in display_methods]),
-            'records': records,
-            'model': self.model.__name__.capitalize()
+        params = self._list_params(request)
+        if self._list_stream(request, params):
+            params.pop('cursor')
+            db_records = self._stream_query(request, session, params)
+
+            def body():
+                # * get_db закрывает сессию до отправки тела - освобождаем соединение сами
+                try:
+                    yield from render_stream(templating, request, 'records.html', self._stream_context(db_records))
+                finally:
+                    session.close()
+
+            return StreamingResponse(body(), media_type='text/html; charset=utf-8')
+
+        key = self._list_cache_key(params, self.get_search_index(session))
+        page = list_cache.get(key) if key is not None else None
+        if page is None:
+            db_records = self._index_list(request, session, params)
+            page = self._cache_page(key, db_records, self._records(db_records))
+
+        return templating.TemplateResponse(request, 'records.html', self._index_context(page))
+
+    async def index_view_async(self, templating: Jinja2Templates, request: Request, session: AsyncSession):
+        """Render a html page list of records (AsyncSession)"""
+
+        params = self._list_params(request)
+        if self._list_stream(request, params):
+            return await self._index_stream_async(templating, request, session, params)
+
+        search_index = self.get_search_index(session)
+        key = self._list_cache_key(params, search_index)
+        page = list_cache.get(key) if key is not None else None
+        if page is None:
+            try:
+                db_records = await index_list_async(
+                    request=request,
+                    model=self.model,
+                    session=session,
+                    statement=self.get_list_statement(request),
+                    search_column_names=self.search_columns,
+                    search_index=search_index,
+                    **params
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+            # * display-методы могут лениво догружать связи/колонки - только внутри run_sync
+            records = await session.run_sync(lambda sync_session: self._records(db_records))
+            page = self._cache_page(key, db_records, records)
+
+        return templating.TemplateResponse(request, 'records.html', self._index_context(page))
+
+    async def _index_stream_async(self, templating: Jinja2Templates, request: Request, session: AsyncSession, params: dict):
+        """
+        Потоковый рендер для AsyncSession: запрос и шаблон - синхронный код, поэтому
+        каждый чанк собирается внутри run_sync (ленивые загрузки и yield_per работают там же)
+        """
+        params.pop('cursor')
+        # * ошибки фильтров - 400 до начала ответа
+        db_records = await session.run_sync(lambda sync_session: self._stream_query(request, sync_session, params))
+
+        async def body():
+            try:
+                chunks = render_stream(templating, request, 'records.html', self._stream_context(db_records))
+                while True:
+                    chunk = await session.run_sync(lambda sync_session: next(chunks, None))
+                    if chunk is None:
+                        break
+                    yield chunk
+            finally:
+                await session.close()
+
+        return StreamingResponse(body(), media_type='text/html; charset=utf-8')
+
+    def lookup_view(self, templating: Jinja2Templates, request: Request, session: Session):
+        """
+        Варианты для автодополнения полей-связей на эту модель: поиск q по префиксу
+        search_columns (или по PK), не больше limit. htmx-фрагмент, format=json - JSON
+        """
+        try:
+            limit = int(request.query_params.get('limit', default=settings.get_setting('lookup', 'limit')))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        limit = min(max(1, limit), settings.get_setting('lookup', 'max_limit'))
+
+        options = lookup(session, self.model, self.search_columns, request.query_params.get('q', default=''), limit)
+
+        if request.query_params.get('format') == 'json':
+            return JSONResponse({'results': [{'value': value, 'label': label} for value, label in options]})
+        context = {
+            'options': options,
+            'target': request.query_params.get('target', default=''),
+            'blank': request.query_params.get('blank', default='0') not in ('0', 'false'),
         }
+        return templating.TemplateResponse(request, 'lookup.html', context)
 
-        return templating.TemplateResponse(request, 'records.html', context)
+    def json_view(self, request: Request, session: Session) -> StreamingResponse:
+        """
+        Список записей в JSON (format=json) или NDJSON (format=ndjson).
+        Записи сериализуются по мере чтения курсора (yield_per), страница
+        целиком в памяти не собирается. compact=0 - записи объектами вместо массивов
+        """
+        columns = self.display_plan.headers
+        row_getter = self.row_getter
+        params = self._list_params(request, default_limit=8)
+        format_ = request.query_params.get('format', default='json')
+        compact = request.query_params.get('compact', default='1') not in ('0', 'false')
+
+        if format_ not in ('json', 'ndjson'):
+            raise HTTPException(status_code=400, detail=f'Unknown format: {format_}')
+
+        extra = None
+        if params['cursor'] is None:
+            params.pop('cursor')
+            db_records = self._stream_query(request, session, params)
+        else:
+            # * keyset-страница ограничена limit, её можно собрать целиком
+            db_records = self._index_list(request, session, params)
+            extra = {'next_cursor': db_records.next_cursor, 'prev_cursor': db_records.prev_cursor}
+
+        def rows():
+            # * Зависимость get_db закрывает сессию до отправки тела ответа -
+            # * стрим сам освобождает соединение, когда дочитает курсор
+            try:
+                for db_record in db_records:
+                    yield row_getter(db_record)
+            finally:
+                session.close()
+
+        if format_ == 'ndjson':
+            return StreamingResponse(ndjson_stream(columns, rows(), compact), media_type='application/x-ndjson')
+        return StreamingResponse(json_stream(columns, rows(), compact, extra), media_type='application/json')
+
+    def csv_view(self, request: Request, session: Session) -> StreamingResponse:
+        """
+        Выгрузка в CSV всей отфильтрованной выборки (filters, search, order).
+        offset / limit / cursor игнорируются, записи читаются порциями по YIELD_PER
+        """
+        columns = self.display_plan.headers
+        row_getter = self.row_getter
+        params = self._list_params(request)
+        for key in ('offset', 'limit', 'cursor'):
+            params.pop(key)
+
+        db_records = self._stream_query(request, session, dict(params, limit=None))
+
+        def rows():
+            try:
+                for db_record in db_records:
+                    yield row_getter(db_record)
+            finally:
+                session.close()
+
+        filename = f'{self.model.__name__.lower()}.csv'
+        return StreamingResponse(
+            csv_stream(columns, rows()),
+            media_type='text/csv; charset=utf-8',
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
 
 
 def display(**parameters):
-    """Decorator for custom fields"""
+    """
+    Decorator for custom fields
+
+    :param display: заголовок колонки
+    :param columns: атрибуты-колонки модели, которые читает метод (для load_only в списке)
+    :param full_object: методу нужен объект целиком - отключает проекцию
+    :param prefetch: связи (пути через точку), которые читает метод - грузятся заранее
+    """
     def decorator(fn):
         # Назначаем кастомные атрибуты функции
+        # * без обёртки - display-метод вызывается на каждую ячейку списка
         for key, val in parameters.items():
                 setattr(fn, key, val)
-
-        @functools.wraps(fn)
-        def wrapper(*args, **kwargs):
-            return fn(*args, **kwargs)
-        return wrapper
+        return fn
     return decorator
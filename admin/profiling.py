@@ -0,0 +1,160 @@
+"""
+Профилирование запросов (opt-in): к-во SQL и время в БД, время рендера
+шаблонов, заголовок Server-Timing, строка в debug-лог и предупреждение
+о повторяющихся одинаковых запросах (вероятный N+1).
+
+    instrument_engine(engine)                 # before/after_cursor_execute
+    app.add_middleware(SQLProfilingMiddleware)
+    templating = ProfiledTemplates(...)       # время рендера шаблонов
+"""
+import contextlib
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional, Tuple
+from fastapi.templating import Jinja2Templates
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+
+from . import settings
+
+
+logger = logging.getLogger(__name__)
+
+# * атрибут контекста выполнения с временем начала SQL (как в admin.metrics)
+START_ATTR = '_admin_profiling_start'
+
+
+class RequestProfile:
+    """Счётчики одного запроса; живёт в contextvar на время обработки"""
+    __slots__ = ('started', 'statements', 'db_time', 'template_time', 'templates')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements: Counter = Counter()
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.templates = 0
+
+    @property
+    def queries(self) -> int:
+        return sum(self.statements.values())
+
+    @property
+    def total_time(self) -> float:
+        return time.perf_counter() - self.started
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Одинаковые statements, выполненные threshold и более раз - вероятный N+1"""
+        return list([(sql, count) for sql, count in self.statements.most_common() if count >= threshold])
+
+    def server_timing(self) -> str:
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.2f}',
+            f'total;dur={self.total_time * 1000:.2f}',
+        ])
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar('admin_request_profile', default=None)
+
+
+@contextlib.contextmanager
+def profile_request() -> Iterator[RequestProfile]:
+    """Профиль для произвольного блока кода (тесты, скрипты)"""
+    profile = RequestProfile()
+    token = current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        current_profile.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None and context is not None:
+        setattr(context, START_ATTR, time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is None:
+        return
+    started = getattr(context, START_ATTR, None)
+    if started is not None:
+        profile.db_time += time.perf_counter() - started
+    profile.statements[statement] += 1
+
+
+def instrument_engine(engine: Engine):
+    """Вешает счётчики на движок (для AsyncEngine - на .sync_engine). Без профиля - no-op"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+# * функции, получающие время каждого рендера в секундах (метрики и т.п.)
+template_listeners: List[Callable[[float], None]] = []
+
+
+class ProfiledTemplates(Jinja2Templates):
+    """Jinja2Templates, засекающий рендер (он выполняется внутри TemplateResponse)"""
+
+    def TemplateResponse(self, *args, **kwargs):
+        profile = current_profile.get()
+        if profile is None and not template_listeners:
+            return super().TemplateResponse(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().TemplateResponse(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            if profile is not None:
+                profile.template_time += elapsed
+                profile.templates += 1
+            for listener in template_listeners:
+                listener(elapsed)
+
+
+class SQLProfilingMiddleware:
+    """
+    ASGI middleware: профиль на каждый http запрос, Server-Timing в ответе,
+    по завершении - debug-строка и warning для повторяющихся запросов.
+    Для потоковых ответов заголовок отражает работу до начала тела
+    """
+
+    def __init__(self, app, threshold: Optional[int] = None):
+        self.app = app
+        self.threshold = threshold or settings.get_setting('profiling', 'n_plus_one_threshold')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                MutableHeaders(scope=message).append('Server-Timing', profile.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            self._report(scope, status, profile)
+
+    def _report(self, scope, status: Optional[int], profile: RequestProfile):
+        path = f"{scope['method']} {scope['path']}"
+        logger.debug(
+            '%s %s total=%.2fms db=%.2fms queries=%d tpl=%.2fms',
+            path, status, profile.total_time * 1000, profile.db_time * 1000,
+            profile.queries, profile.template_time * 1000,
+        )
+        for statement, count in profile.repeated(self.threshold):
+            logger.warning('%s: possible N+1, statement executed %d times: %s', path, count, statement)
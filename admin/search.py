@@ -0,0 +1,151 @@
+import re
+from typing import Dict, List, Optional, Sequence, Union
+from sqlalchemy import Column, Integer, MetaData, Table, event, inspect, literal_column, text, Select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Query
+
+from .types import SQLAlchemyModel
+
+
+class SearchIndex:
+    """
+    FTS5 shadow-таблица <table>_fts для ModelAdmin.search_columns (только SQLite).
+
+    Таблица external content (данные не дублируются), синхронизируется триггерами
+    на insert/update/delete, создаётся и удаляется вместе с таблицей модели
+    (create_all / drop_all). Модель должна иметь целочисленный PK (rowid).
+    """
+
+    def __init__(self, model: SQLAlchemyModel, columns: Sequence[str]):
+        table = model.__table__
+        pk_columns = list(table.primary_key.columns)
+        if len(pk_columns) != 1 or not isinstance(pk_columns[0].type, Integer):
+            raise ValueError(f'FTS search for {model.__name__} needs a single integer primary key')
+        if not columns:
+            raise ValueError(f'FTS search for {model.__name__} needs search_columns')
+
+        self.model = model
+        self.table = table
+        self.pk = pk_columns[0]
+        self.columns = list(columns)
+        self.name = f'{table.name}_fts'
+        # * отдельная MetaData - create_all не должен пытаться создать её как обычную таблицу
+        self.fts = Table(
+            self.name, MetaData(),
+            Column('rowid', Integer),
+            Column('rank'),
+            *[Column(c) for c in self.columns]
+        )
+
+    def objects(self) -> Dict[str, str]:
+        """
+        Имя -> CREATE объекта: FTS таблица и триггеры синхронизации.
+        Без IF NOT EXISTS - в таком виде SQLite хранит DDL в sqlite_master
+        """
+        table, name, pk = self.table.name, self.name, self.pk.name
+        columns = ', '.join(self.columns)
+        new_values = ', '.join(f'new.{c}' for c in self.columns)
+        old_values = ', '.join(f'old.{c}' for c in self.columns)
+        insert_new = f"INSERT INTO {name}(rowid, {columns}) VALUES (new.{pk}, {new_values});"
+        delete_old = f"INSERT INTO {name}({name}, rowid, {columns}) VALUES ('delete', old.{pk}, {old_values});"
+        return {
+            name: f"CREATE VIRTUAL TABLE {name} USING fts5("
+                  f"{columns}, content='{table}', content_rowid='{pk}', prefix='2 3')",
+            f'{name}_ai': f"CREATE TRIGGER {name}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+            f'{name}_ad': f"CREATE TRIGGER {name}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+            f'{name}_au': f"CREATE TRIGGER {name}_au AFTER UPDATE ON {table} BEGIN {delete_old} {insert_new} END",
+        }
+
+    def ddl(self) -> List[str]:
+        return list(self.objects().values())
+
+    def create(self, connection: Connection):
+        """
+        Создаёт FTS таблицу и триггеры и строит индекс по уже заполненной таблице.
+        Если определение сменилось (search_columns) - старые таблица и триггеры пересоздаются
+        """
+        if connection.dialect.name != 'sqlite':
+            return
+        objects = self.objects()
+        stored = dict([
+            (name, sql) for name, sql in connection.execute(text("SELECT name, sql FROM sqlite_master"))
+            if name in objects
+        ])
+        if stored == objects:
+            return
+        if stored:
+            self.drop(connection)
+        for statement in objects.values():
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')")
+
+    def drop(self, connection: Connection):
+        if connection.dialect.name != 'sqlite':
+            return
+        # * триггеры висят на таблице модели - без FTS таблицы они ломают запись в неё
+        for name in self.objects():
+            if name != self.name:
+                connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+        connection.exec_driver_sql(f'DROP TABLE IF EXISTS {self.name}')
+
+    def match_query(self, search: str) -> Optional[str]:
+        """Строка поиска -> FTS5 запрос: каждое слово в кавычках и как префикс"""
+        words = re.findall(r'\w+', search)
+        if not words:
+            return None
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def apply(self, query: Union[Query, Select], search: str) -> Union[Query, Select]:
+        """JOIN через FTS таблицу + MATCH. Порядок по релевантности - rank_clause()"""
+        match = self.match_query(search)
+        if match is None:
+            return query
+        pk = getattr(self.model, inspect(self.model).get_property_by_column(self.pk).key)
+        return (
+            query
+            .join(self.fts, self.fts.c.rowid == pk)
+            .filter(literal_column(self.name).op('MATCH')(match))
+        )
+
+    def rank_clause(self):
+        return self.fts.c.rank
+
+
+# registered indexes: model -> SearchIndex
+indexes: Dict[SQLAlchemyModel, SearchIndex] = dict()
+
+
+def register_index(model: SQLAlchemyModel, columns: Sequence[str]) -> SearchIndex:
+    """Регистрирует FTS индекс модели и вешает его создание/удаление на таблицу"""
+    index = indexes.get(model)
+    if index is not None and index.columns == list(columns):
+        return index
+
+    new_index = SearchIndex(model, columns)
+    if index is None:
+        # * слушатели берут индекс из реестра при вызове - смена колонок не оставляет старый
+        table = model.__table__
+        event.listen(table, 'after_create', lambda target, connection, **kw: indexes[model].create(connection))
+        event.listen(table, 'after_drop', lambda target, connection, **kw: indexes[model].drop(connection))
+    indexes[model] = new_index
+    return new_index
+
+
+def get_index(model: SQLAlchemyModel) -> Optional[SearchIndex]:
+    return indexes.get(model)
+
+
+def indexes_ddl() -> List[str]:
+    """DDL всех зарегистрированных индексов - для отпечатка схемы"""
+    return list([statement for index in indexes.values() for statement in index.ddl()])
+
+
+def create_indexes(engine: Engine):
+    """
+    Создаёт FTS индексы для уже существующих таблиц
+    (after_create срабатывает только когда create_all создаёт таблицу)
+    """
+    with engine.begin() as connection:
+        for index in indexes.values():
+            if inspect(connection).has_table(index.table.name):
+                index.create(connection)
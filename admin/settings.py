@@ -1,3 +1,6 @@
+import os
+
+
 SETTINGS = {
     'form': {
         'readonly_fields': ['created_at', 'updated_at'],
@@ -7,7 +10,44 @@ SETTINGS = {
             'input': 'form-input'
         },
         'invalid_class': 'is-invalid',
-    }
+    },
+    'site': {
+        # * период пересинхронизации к-ва записей с БД в секундах, 0 - только события
+        'counts_ttl': 0,
+    },
+    'list_cache': {
+        # * кэш страниц списка: макс. к-во страниц и примерный объём в байтах
+        'max_entries': 256,
+        'max_bytes': 8 * 1024 * 1024,
+        # * срок жизни страницы в секундах: записи других воркеров и в обход ORM сброс не вызывают
+        'ttl': 30,
+    },
+    'lookup': {
+        # * автодополнение связей: к-во вариантов по умолчанию / максимум, размер кэша подписей
+        'limit': 10,
+        'max_limit': 50,
+        'label_cache_size': 1024,
+    },
+    'profiling': {
+        # * SQL / шаблоны / Server-Timing на каждый запрос (admin.profiling), ADMIN_PROFILING=1
+        'enabled': os.environ.get('ADMIN_PROFILING', '') in ('1', 'true'),
+        # * столько одинаковых запросов за один http запрос - предупреждение о N+1
+        'n_plus_one_threshold': 5,
+    },
+    'templates': {
+        # * байткод шаблонов на диске (jinja2.FileSystemBytecodeCache), ADMIN_JINJA_BYTECODE_CACHE=0 - выключить
+        'bytecode_cache': os.environ.get('ADMIN_JINJA_BYTECODE_CACHE', '1') in ('1', 'true'),
+        # * пустая строка - каталог Jinja по умолчанию (свой у каждого пользователя, права проверяются);
+        # * иначе - каталог, доступный на запись только серверу (например, внутри проекта)
+        'bytecode_cache_dir': os.environ.get('ADMIN_JINJA_CACHE_DIR', ''),
+        # * кэш фрагментов {% cache %}: к-во блоков и примерный объём в байтах
+        'fragment_cache_size': 128,
+        'fragment_cache_bytes': 2 * 1024 * 1024,
+    },
+    'metrics': {
+        # * /admin/_metrics (admin.metrics): гистограммы роутов, SQL, шаблонов; ADMIN_METRICS=0 - выключить
+        'enabled': os.environ.get('ADMIN_METRICS', '1') in ('1', 'true'),
+    },
 }
 
 
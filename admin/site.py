@@ -1,12 +1,17 @@
 from typing import Dict, List, Tuple, Type
+from sqlalchemy.orm import Session
 from .model import ModelAdmin
 from .types import SQLAlchemyModel
+from .counts import CountCache
+from .search import register_index
+from . import settings
 
 
 __all__ = (
     'register',
     'get_model_class',
     'get_model_admin_instance',
+    'get_models_sizes',
 )
 
 
@@ -15,6 +20,9 @@ storage: Dict[str, Tuple[Type[SQLAlchemyModel], Type[ModelAdmin]]] = dict()
 # cached instances
 instances: Dict[str, ModelAdmin] = dict()
 
+# cached models sizes (sidebar)
+counts = CountCache(ttl=settings.get_setting('site', 'counts_ttl'))
+
 
 def register(model_class: SQLAlchemyModel, model_admin_class: ModelAdmin):
     """
@@ -25,6 +33,11 @@ def register(model_class: SQLAlchemyModel, model_admin_class: ModelAdmin):
     """
     normalized_model_name = model_class.__name__.lower()
     storage[normalized_model_name] = (model_class, model_admin_class)
+    # * при перерегистрации другим классом ModelAdmin старый инстанс (и его план) не годится
+    instances.pop(normalized_model_name, None)
+    counts.watch(model_class)
+    if model_admin_class.search_fts:
+        register_index(model_class, model_admin_class.search_columns)
 
 
 def get_model_class(model_name: str) -> Type[SQLAlchemyModel]:
@@ -56,6 +69,14 @@ def get_all_sqlalchemy_models() -> List[Type[SQLAlchemyModel]]:
     return list([m[0] for m in storage.values()])
 
 
+def get_models_sizes(session: Session) -> List[Tuple[str, int]]:
+    """
+    Возвращает список (название модели, к-во записей) для сайдбара.
+    К-во берётся из кэша counts, а не через COUNT(*) на каждый запрос.
+    """
+    return counts.sizes(session, get_all_sqlalchemy_models())
+
+
 # def get_sqlalchemy_model_class_by(name: str) -> Type[SQLAlchemyModel]:
 #     name = name.lower()
 #     return next(filter(lambda x: x.__name__.lower() == name, admin_model_storage.keys()))
@@ -0,0 +1,111 @@
+"""
+Окружение Jinja для шаблонов админки: байткод шаблонов на диске (быстрый
+старт воркеров) и кэш фрагментов в памяти.
+
+    {% cache "sidebar", models_sizes %} ... {% endcache %}
+
+Ключ фрагмента - имя и версия данных (все аргументы после имени); при смене
+версии блок рендерится заново, старые записи вытесняются LRU.
+
+render_stream - потоковый рендер (generate) для больших страниц.
+"""
+import os
+from typing import Any, Callable, Hashable, Iterator, Optional, Sequence, Union
+import jinja2
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from .cache import ResultCache
+from . import settings
+
+
+# * первый чанк потокового рендера уходит, как только набрался - шапка таблицы и первые строки
+STREAM_CHUNK_SIZE = 16 * 1024
+
+fragment_cache = ResultCache(
+    max_entries=settings.get_setting('templates', 'fragment_cache_size'),
+    max_bytes=settings.get_setting('templates', 'fragment_cache_bytes'),
+)
+
+
+def _freeze(value: Any) -> Hashable:
+    """Версия фрагмента -> хешируемый ключ: списки в кортежи, прочее нехешируемое - в str"""
+    if isinstance(value, (list, tuple)):
+        return tuple([_freeze(item) for item in value])
+    if isinstance(value, dict):
+        return tuple(sorted([(key, _freeze(item)) for key, item in value.items()]))
+    try:
+        hash(value)
+    except TypeError:
+        return str(value)
+    return value
+
+
+class FragmentCacheExtension(Extension):
+    """Тег {% cache name, version... %}: готовый HTML блока из fragment_cache"""
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render', [nodes.List(args)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, key: list, caller: Callable[[], str]) -> str:
+        # * autoescape: результат caller() уже экранирован - возвращаем как Markup
+        key = (id(self.environment), *_freeze(key))
+        html = fragment_cache.get(key)
+        if html is None:
+            html = caller()
+            fragment_cache.set(key, html, len(html) * 2)
+        return Markup(html)
+
+
+def bytecode_cache(directory: Optional[str] = None) -> Optional[jinja2.BytecodeCache]:
+    """
+    Байткод шаблонов на диске. Без каталога - каталог Jinja по умолчанию: отдельный
+    для пользователя, Jinja проверяет владельца и права. Общий фиксированный путь
+    в /tmp не годится - чужой пользователь может подложить туда байткод
+    """
+    if not settings.get_setting('templates', 'bytecode_cache'):
+        return None
+    directory = directory or settings.get_setting('templates', 'bytecode_cache_dir')
+    if directory:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    return jinja2.FileSystemBytecodeCache(directory or None)
+
+
+def create_environment(directory: Union[str, Sequence[str]], **options) -> jinja2.Environment:
+    """Environment как у Jinja2Templates (autoescape) + байткод на диске + тег cache"""
+    options.setdefault('loader', jinja2.FileSystemLoader(directory))
+    options.setdefault('autoescape', True)
+    options.setdefault('bytecode_cache', bytecode_cache())
+    options['extensions'] = [*options.get('extensions', ()), FragmentCacheExtension]
+    return jinja2.Environment(**options)
+
+
+def render_stream(templates, request, name: str, context: dict, size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Потоковый рендер шаблона (Template.generate) чанками ~size символов.
+    Контекст собирается как в Jinja2Templates.TemplateResponse: request + context_processors
+    """
+    context = dict(context)
+    context.setdefault('request', request)
+    for processor in templates.context_processors:
+        context.update(processor(request))
+
+    buffer = []
+    buffered = 0
+    for part in templates.get_template(name).generate(context):
+        buffer.append(part)
+        buffered += len(part)
+        if buffered >= size:
+            yield ''.join(buffer)
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer)
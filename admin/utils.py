@@ -3,12 +3,15 @@ from typing import Type
 from fastapi import Request, FastAPI, Depends
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import RedirectResponse
-from wtforms import Form, ValidationError, validators, StringField, IntegerField, SelectField
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from wtforms import Form, ValidationError, validators, StringField, IntegerField
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, inspect
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Mapper, DeclarativeBase, Session, DeclarativeMeta
 from wtforms_sqlalchemy.orm import ModelConverter
 
 from . import settings
+from .validators import unique_conflicts, apply_integrity_error
+from .fields import AutocompleteField
 
 
 def Unique(model, field_name: str, session_getter):
@@ -54,23 +57,61 @@ def nullable_int(val):
 
 
 class AdminForm(Form):
-    """Кастомная форма"""
+    """
+    Кастомная форма
+
+    Класс формы кэшируется (admin.forms.model_form_class), поэтому сессия
+    передаётся при создании инстанса: AdminForm(formdata, db_session=session)
+    """
 
     class Meta:
         model = None
 
-    def validate(self):
-        success = super().validate()
+    # * модель, для которой сгенерирован класс формы
+    model = None
+
+    def __init__(self, formdata=None, obj=None, prefix='', data=None, meta=None, db_session=None, **kwargs):
+        super().__init__(formdata=formdata, obj=obj, prefix=prefix, data=data, meta=meta, **kwargs)
+        self.db_session = db_session
+        self.obj = obj
+        self.unique_conflicts = None
+
+        # * поля связей (QuerySelectField, AutocompleteField) ходят в БД через сессию этого инстанса
+        if db_session is not None and self.model is not None:
+            relationships = inspect(self.model).relationships
+            for name, field in self._fields.items():
+                if name not in relationships:
+                    continue
+                if hasattr(field, 'query_factory'):
+                    field.query = db_session.query(relationships[name].mapper.class_)
+                elif hasattr(field, 'session'):
+                    field.session = db_session
+
+    def validate(self, extra_validators=None):
+        # * Все проверки уникальности формы - одним запросом
+        if self.db_session is not None:
+            self.unique_conflicts = unique_conflicts(self, self.db_session)
+
+        success = super().validate(extra_validators=extra_validators)
+        self._mark_invalid_fields()
+        return success
+
+    def apply_integrity_error(self, error: IntegrityError) -> bool:
+        """Ошибки уникальности из IntegrityError (гонка проверки и вставки) -> ошибки полей"""
+        applied = apply_integrity_error(self, error)
+        self._mark_invalid_fields()
+        return applied
 
+    def _mark_invalid_fields(self):
         # * Добавим invalid-class к полям у которых есть ошибка валидации
         # * При этом сохраняем уже имеющиеся классы
+        invalid_class = settings.get_setting('form', 'invalid_class')
         for field in self._fields.values():
             if field.errors:
                 current_class = field.render_kw.get("class", "")
-                invalid_class = settings.get_setting('form', 'invalid_class')
-                field.render_kw["class"] = f"{current_class} {invalid_class}".strip()
-
-        return success
+                if invalid_class not in current_class.split():
+                    # * render_kw общий для всех инстансов закэшированного класса формы - копируем
+                    field.render_kw = {**field.render_kw, "class": f"{current_class} {invalid_class}".strip()}
 
 
 def form_for_model(model: Type[DeclarativeBase], base: DeclarativeMeta, session: Session) -> Type[AdminForm]:
@@ -107,17 +148,16 @@ def form_for_model(model: Type[DeclarativeBase], base: DeclarativeMeta, session:
         elif isinstance(type_, Integer):
             fk = next(iter(column.foreign_keys), None)
             if fk:
-                # Внешний ключ → SelectField
+                # Внешний ключ → AutocompleteField
                 target_table = fk.column.table
                 target_model = _resolve_model(target_table, base)
 
-                # Создаём choices из target_model
-                # session = session_getter()
-                rows = session.query(target_model).all()
-                choices = [('', '---')] + [(getattr(row, fk.column.name), str(row)) for row in rows]
-
-                fields[name] = SelectField(name.capitalize(), choices=choices, coerce=nullable_int, 
-                                           validators=_validators, render_kw={'class': 'form-select'})
+                # * автодополнение через /admin/<target>/lookup вместо choices из всей таблицы
+                fields[name] = AutocompleteField(
+                    name.capitalize(), validators=_validators, related_model=target_model,
+                    allow_blank=column.nullable, pk_only=True, session=session,
+                    render_kw={'class': 'form-control'}
+                )
             else:
                 fields[name] = IntegerField(name.capitalize(), validators=_validators, render_kw={'class': 'form-control'})
 
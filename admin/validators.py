@@ -1,15 +1,33 @@
+import re
+from typing import Set
+from sqlalchemy import exists, inspect, literal, select, union_all
+from sqlalchemy.exc import IntegrityError
 from wtforms.validators import StopValidation
 
 
 class Unique:
-    def __init__(self, model, field, session, message="Must be unique"):
+    """
+    Проверка уникальности значения колонки.
+    Сессия берётся из инстанса формы (form.db_session), а если её нет - из session
+
+    Если форма заранее посчитала конфликты всех Unique полей одним запросом
+    (form.unique_conflicts, см. unique_conflicts), отдельный запрос не делается
+    """
+    def __init__(self, model, field, session=None, message="Must be unique"):
         self.model = model
         self.field = field
         self.session = session
         self.message = message
 
     def __call__(self, form, field):
-        query = self.session.query(self.model).filter(getattr(self.model, self.field) == field.data)
+        conflicts = getattr(form, 'unique_conflicts', None)
+        if conflicts is not None:
+            if field.name in conflicts:
+                raise StopValidation(self.message)
+            return
+
+        session = getattr(form, 'db_session', None) or self.session
+        query = session.query(self.model).filter(getattr(self.model, self.field) == field.data)
 
         # При редактировании — не считаем текущий объект за дубликат
         if hasattr(form, 'obj'):
@@ -19,3 +37,66 @@ class Unique:
 
         if query.first():
             raise StopValidation(self.message)
+
+
+def unique_conflicts(form, session) -> Set[str]:
+    """
+    Проверяет все Unique поля формы одним запросом:
+
+        SELECT 'username' WHERE EXISTS (SELECT users.id FROM users WHERE users.username = ?)
+        UNION ALL
+        SELECT 'email' WHERE EXISTS (...)
+
+    Возвращает имена полей, значения которых уже заняты
+    """
+    obj = getattr(form, 'obj', None)
+    selects = []
+
+    for field in form:
+        for validator in field.validators:
+            if not isinstance(validator, Unique) or field.data is None:
+                continue
+            # При редактировании — не считаем текущий объект за дубликат
+            if obj is not None and getattr(obj, validator.field, None) == field.data:
+                continue
+
+            model = validator.model
+            column = getattr(model, validator.field)
+            pk_columns = inspect(model).primary_key
+            taken = exists(select(*pk_columns).where(column == field.data))
+            selects.append(select(literal(field.name).label('field')).where(taken))
+
+    if not selects:
+        return set()
+
+    statement = selects[0] if len(selects) == 1 else union_all(*selects)
+    return set(session.scalars(statement))
+
+
+# sqlite: UNIQUE constraint failed: users.username, users.email
+# postgres: Key (username)=(bob) already exists.
+UNIQUE_ERROR_PATTERNS = (
+    re.compile(r'UNIQUE constraint failed: (?P<columns>[\w., ]+)'),
+    re.compile(r'Key \((?P<columns>[\w, ]+)\)=.* already exists'),
+)
+
+
+def apply_integrity_error(form, error: IntegrityError, message: str = "Must be unique") -> bool:
+    """
+    Фолбэк для гонок между проверкой и вставкой: раскладывает ошибку
+    уникальности из IntegrityError по полям формы. True - если ошибка разобрана
+    """
+    text = str(error.orig)
+    for pattern in UNIQUE_ERROR_PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        applied = False
+        for column in match.group('columns').split(','):
+            name = column.strip().split('.')[-1]
+            field = form._fields.get(name)
+            if field is not None:
+                field.errors = list(field.errors) + [message]
+                applied = True
+        return applied
+    return False
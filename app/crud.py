@@ -1,9 +1,17 @@
 from typing import Type, Any, Union, Sequence, Literal, TypedDict
 from sqlalchemy.orm import Session, DeclarativeMeta
-from sqlalchemy import inspect
+from sqlalchemy import inspect, delete, update
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
 
+def _needs_orm_delete(mapper) -> bool:
+    """Есть ли у модели связи, которые ORM обрабатывает при удалении родителя"""
+    return any(
+        rel.direction.name in ('ONETOMANY', 'MANYTOMANY') and not rel.passive_deletes
+        for rel in mapper.relationships
+    )
+
+
 class DeleteResult(TypedDict):
     success: bool
     reason: Union[Literal["not_found", "constraint_error", "unknown_error"], None]
@@ -39,17 +47,25 @@ def delete_by_pk(
                 "error": f"Expected {len(pk_columns)} PK values, got {len(pk_values)}"
             }
 
-        filters = [col == val for col, val in zip(pk_columns, pk_values)]
-        instance = session.query(model_cls).filter(*filters).first()
-
-        if not instance:
+        key = _pk_key(pk_columns, pk_values)
+        if _needs_orm_delete(mapper):
+            # * каскады связей (обнуление FK у детей и т.п.) выполняет только session.delete
+            instance = session.get(model_cls, key)
+            found = instance is not None
+            if found:
+                session.delete(instance)
+        else:
+            # * Один DELETE ... WHERE pk без предварительной загрузки объекта
+            filters = [col == val for col, val in zip(pk_columns, key)]
+            found = session.execute(delete(model_cls).where(*filters)).rowcount > 0
+
+        if not found:
             return {
                 "success": False,
                 "reason": "not_found",
                 "error": None
             }
 
-        session.delete(instance)
         if commit:
             session.commit()
 
@@ -127,10 +143,23 @@ def update_by_pk(
                 "updated": None
             }
 
-        filters = [col == val for col, val in zip(pk_columns, pk_values)]
-        instance = session.query(model_cls).filter(*filters).first()
-
-        if not instance:
+        filters = [col == val for col, val in zip(pk_columns, _pk_key(pk_columns, pk_values))]
+        values = {k: v for k, v in updates.items() if k in mapper.column_attrs}
+        statement = update(model_cls).where(*filters).values(**values)
+
+        # * Один UPDATE ... WHERE pk; обновлённые значения - через RETURNING, если он есть
+        if values and session.get_bind(mapper=mapper).dialect.update_returning:
+            row = session.execute(statement.returning(*[getattr(model_cls, k) for k in values])).first()
+            found = row is not None
+            updated = dict(zip(values, row)) if found else None
+        elif values:
+            found = session.execute(statement).rowcount > 0
+            updated = dict(values)
+        else:
+            found = session.get(model_cls, _pk_key(pk_columns, pk_values)) is not None
+            updated = dict()
+
+        if not found:
             return {
                 "success": False,
                 "reason": "not_found",
@@ -138,10 +167,6 @@ def update_by_pk(
                 "updated": None
             }
 
-        for key, value in updates.items():
-            if hasattr(instance, key):
-                setattr(instance, key, value)
-
         if commit:
             session.commit()
 
@@ -149,7 +174,7 @@ def update_by_pk(
             "success": True,
             "reason": None,
             "error": None,
-            "updated": {k: getattr(instance, k) for k in updates.keys()}
+            "updated": updated
         }
 
     except IntegrityError as e:
@@ -211,8 +236,8 @@ def retrieve_by_pk(
                 "instance": None
             }
 
-        filters = [col == val for col, val in zip(pk_columns, pk_values)]
-        instance = session.query(model_cls).filter(*filters).first()
+        # * session.get сначала смотрит в identity map и ходит в БД только при промахе
+        instance = session.get(model_cls, _pk_key(pk_columns, pk_values))
 
         if not instance:
             return {
@@ -236,3 +261,251 @@ def retrieve_by_pk(
             "error": str(e),
             "instance": None
         }
+
+
+from typing import Dict, List, Tuple
+from sqlalchemy import delete, update, select, tuple_
+from sqlalchemy.orm import selectinload
+
+
+BULK_CHUNK_SIZE = 500
+
+
+def _pk_key(pk_columns: Sequence[Any], pk_values: Union[Any, Sequence[Any]]) -> Tuple[Any, ...]:
+    """Значение PK -> кортеж; строки (из форм) приводятся к python-типу колонки"""
+    if not isinstance(pk_values, (tuple, list)):
+        pk_values = (pk_values,)
+
+    key = []
+    for column, value in zip(pk_columns, pk_values):
+        if isinstance(value, str):
+            try:
+                python_type = column.type.python_type
+            except NotImplementedError:
+                python_type = str
+            if python_type is not str:
+                try:
+                    value = python_type(value)
+                except (TypeError, ValueError):
+                    pass
+        key.append(value)
+    return tuple(key)
+
+
+def _pk_clause(pk_columns: Sequence[Any], keys: Sequence[Tuple[Any, ...]]):
+    if len(pk_columns) == 1:
+        return pk_columns[0].in_([key[0] for key in keys])
+    return tuple_(*pk_columns).in_(keys)
+
+
+def _split_keys(pk_columns, pk_values_list) -> Tuple[List[Any], List[Tuple[Any, ...]]]:
+    """(ключи в порядке запроса или None для невалидных, уникальные валидные ключи)"""
+    keys = []
+    for pk_values in pk_values_list:
+        values = pk_values if isinstance(pk_values, (tuple, list)) else (pk_values,)
+        keys.append(_pk_key(pk_columns, values) if len(values) == len(pk_columns) else None)
+    valid = list(dict.fromkeys([key for key in keys if key is not None]))
+    return keys, valid
+
+
+def _chunks(keys: Sequence[Any], size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(keys), size):
+        yield keys[start:start + size]
+
+
+def delete_many_by_pk(
+    model_cls: Type[DeclarativeMeta],
+    pk_values_list: Sequence[Union[Any, Sequence[Any]]],
+    session: Session,
+    commit: bool = True
+) -> List[DeleteResult]:
+    """
+    Удаляет записи по списку PK (включая составные) set-based запросами
+    DELETE ... WHERE pk IN (...) RETURNING pk порциями по BULK_CHUNK_SIZE в одной транзакции.
+    Если у модели есть связи, которые ORM обрабатывает при удалении (_needs_orm_delete),
+    порция загружается (дети - selectinload) и удаляется через session.delete, как в delete_by_pk.
+
+    :param model_cls: Класс модели
+    :param pk_values_list: Список значений PK или кортежей значений
+    :param session: SQLAlchemy session
+    :param commit: Делать ли commit
+    :return: Список DeleteResult в порядке pk_values_list
+    """
+    mapper = inspect(model_cls)
+    pk_columns = mapper.primary_key
+    keys, valid = _split_keys(pk_columns, pk_values_list)
+    invalid: DeleteResult = {
+        "success": False,
+        "reason": "unknown_error",
+        "error": f"Expected {len(pk_columns)} PK values"
+    }
+
+    try:
+        deleted = set()
+        returning = session.get_bind(mapper=mapper).dialect.delete_returning
+        orm_delete = _needs_orm_delete(mapper)
+        for chunk in _chunks(valid):
+            clause = _pk_clause(pk_columns, chunk)
+            if orm_delete:
+                # * каскады связей (обнуление FK у детей и т.п.) выполняет только session.delete
+                loaders = [
+                    selectinload(getattr(model_cls, rel.key)) for rel in mapper.relationships
+                    if rel.direction.name in ('ONETOMANY', 'MANYTOMANY') and not rel.passive_deletes
+                ]
+                rows = []
+                for instance in session.scalars(select(model_cls).where(clause).options(*loaders)):
+                    session.delete(instance)
+                    rows.append(mapper.primary_key_from_instance(instance))
+                session.flush()
+            elif returning:
+                rows = session.execute(delete(model_cls).where(clause).returning(*pk_columns))
+            else:
+                rows = session.execute(select(*pk_columns).where(clause)).all()
+                session.execute(delete(model_cls).where(clause))
+            deleted.update(tuple(row) for row in rows)
+
+        if commit:
+            session.commit()
+
+    except IntegrityError as e:
+        session.rollback()
+        error: DeleteResult = {"success": False, "reason": "constraint_error", "error": str(e.orig)}
+        return [dict(error) if key is not None else dict(invalid) for key in keys]
+    except SQLAlchemyError as e:
+        session.rollback()
+        error: DeleteResult = {"success": False, "reason": "unknown_error", "error": str(e)}
+        return [dict(error) if key is not None else dict(invalid) for key in keys]
+
+    results = []
+    for key in keys:
+        if key is None:
+            results.append(dict(invalid))
+        elif key in deleted:
+            results.append({"success": True, "reason": None, "error": None})
+        else:
+            results.append({"success": False, "reason": "not_found", "error": None})
+    return results
+
+
+def update_many_by_pk(
+    model_cls: Type[DeclarativeMeta],
+    pk_values_list: Sequence[Union[Any, Sequence[Any]]],
+    updates: Mapping[str, Any],
+    session: Session,
+    commit: bool = True
+) -> List[UpdateResult]:
+    """
+    Применяет одни и те же updates к записям из списка PK set-based запросами
+    UPDATE ... WHERE pk IN (...) RETURNING pk, <поля> в одной транзакции.
+
+    :param model_cls: Класс модели SQLAlchemy
+    :param pk_values_list: Список значений PK или кортежей значений
+    :param updates: Словарь с полями и новыми значениями
+    :param session: SQLAlchemy session
+    :param commit: Делать ли commit
+    :return: Список UpdateResult в порядке pk_values_list
+    """
+    mapper = inspect(model_cls)
+    pk_columns = mapper.primary_key
+    keys, valid = _split_keys(pk_columns, pk_values_list)
+    values = {k: v for k, v in updates.items() if k in mapper.column_attrs}
+    invalid: UpdateResult = {
+        "success": False,
+        "reason": "unknown_error",
+        "error": f"Expected {len(pk_columns)} PK values",
+        "updated": None
+    }
+
+    try:
+        updated: Dict[Tuple[Any, ...], dict] = dict()
+        returning = session.get_bind(mapper=mapper).dialect.update_returning
+        updated_columns = [getattr(model_cls, k) for k in values]
+        for chunk in _chunks(valid):
+            clause = _pk_clause(pk_columns, chunk)
+            if returning:
+                statement = update(model_cls).where(clause).values(**values).returning(*pk_columns, *updated_columns)
+                for row in session.execute(statement):
+                    updated[tuple(row[:len(pk_columns)])] = dict(zip(values, row[len(pk_columns):]))
+            else:
+                for row in session.execute(select(*pk_columns).where(clause)).all():
+                    updated[tuple(row)] = dict(values)
+                session.execute(update(model_cls).where(clause).values(**values))
+
+        if commit:
+            session.commit()
+
+    except IntegrityError as e:
+        session.rollback()
+        error: UpdateResult = {"success": False, "reason": "constraint_error", "error": str(e.orig), "updated": None}
+        return [dict(error) if key is not None else dict(invalid) for key in keys]
+    except SQLAlchemyError as e:
+        session.rollback()
+        error: UpdateResult = {"success": False, "reason": "unknown_error", "error": str(e), "updated": None}
+        return [dict(error) if key is not None else dict(invalid) for key in keys]
+
+    results = []
+    for key in keys:
+        if key is None:
+            results.append(dict(invalid))
+        elif key in updated:
+            results.append({"success": True, "reason": None, "error": None, "updated": updated[key]})
+        else:
+            results.append({"success": False, "reason": "not_found", "error": None, "updated": None})
+    return results
+
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def delete_by_pk_async(
+    model_cls: Type[DeclarativeMeta],
+    pk_values: Union[Any, Sequence[Any]],
+    session: AsyncSession,
+    commit: bool = True
+) -> DeleteResult:
+    """
+    Async вариант delete_by_pk. Та же логика выполняется через AsyncSession.run_sync,
+    ввод-вывод идёт через async драйвер и не блокирует event loop.
+    """
+    return await session.run_sync(lambda sync_session: delete_by_pk(model_cls, pk_values, sync_session, commit))
+
+
+async def update_by_pk_async(
+    model_cls: Type[DeclarativeMeta],
+    pk_values: Union[Any, Sequence[Any]],
+    updates: Mapping[str, Any],
+    session: AsyncSession,
+    commit: bool = True
+) -> UpdateResult:
+    """Async вариант update_by_pk (см. delete_by_pk_async)"""
+    return await session.run_sync(lambda sync_session: update_by_pk(model_cls, pk_values, updates, sync_session, commit))
+
+
+async def retrieve_by_pk_async(
+    model_cls: Type[DeclarativeMeta],
+    pk_values: Union[Any, Sequence[Any]],
+    session: AsyncSession
+) -> RetrieveResult:
+    """Async вариант retrieve_by_pk (см. delete_by_pk_async)"""
+    return await session.run_sync(lambda sync_session: retrieve_by_pk(model_cls, pk_values, sync_session))
+
+
+async def delete_many_by_pk_async(
+    model_cls: Type[DeclarativeMeta],
+    pk_values_list: Sequence[Union[Any, Sequence[Any]]],
+    session: AsyncSession,
+    commit: bool = True
+) -> List[DeleteResult]:
+    """Async вариант delete_many_by_pk (см. delete_by_pk_async)"""
+    return await session.run_sync(lambda sync_session: delete_many_by_pk(model_cls, pk_values_list, sync_session, commit))
+
+
+async def update_many_by_pk_async(
+    model_cls: Type[DeclarativeMeta],
+    pk_values_list: Sequence[Union[Any, Sequence[Any]]],
+    updates: Mapping[str, Any],
+    session: AsyncSession,
+    commit: bool = True
+) -> List[UpdateResult]:
+    """Async вариант update_many_by_pk (см. delete_by_pk_async)"""
+    return await session.run_sync(lambda sync_session: update_many_by_pk(model_cls, pk_values_list, updates, sync_session, commit))
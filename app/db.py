@@ -1,11 +1,94 @@
-from sqlalchemy import create_engine
+import hashlib
+import os
+from typing import Any, Callable, Dict, Optional, Sequence
+from sqlalchemy import Column, MetaData, String, Table, create_engine, delete, event, insert, select, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, DeclarativeMeta
 
 
-engine = create_engine('sqlite:///database.sqlite3')
+DATABASE_URL = 'sqlite:///database.sqlite3'
+ASYNC_DATABASE_URL = 'sqlite+aiosqlite:///database.sqlite3'
+
+# * профиль SQLite выбирается переменной окружения: DB_PROFILE=throughput
+DB_PROFILE_ENV = 'DB_PROFILE'
+DEFAULT_DB_PROFILE = 'durable'
+
+# * pragmas - выполняются на каждом новом соединении (connect event), pool - параметры пула
+DB_PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    # * настройки SQLite по умолчанию (rollback journal, synchronous=FULL)
+    'sqlite-default': {
+        'pragmas': {},
+        'pool': {},
+    },
+    # * WAL: читатели не блокируют писателя; FULL - fsync на каждый commit
+    'durable': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'FULL',
+            'busy_timeout': 5000,
+            'cache_size': -16000,  # ~16MB (отрицательное - в KiB)
+            'temp_store': 'MEMORY',
+        },
+        'pool': {'pool_size': 5, 'max_overflow': 10, 'pool_timeout': 30},
+    },
+    # * NORMAL в WAL не теряет целостность, но последние commit-ы могут пропасть при сбое питания
+    'throughput': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 10000,
+            'cache_size': -64000,  # ~64MB
+            'temp_store': 'MEMORY',
+            'mmap_size': 256 * 1024 * 1024,
+        },
+        'pool': {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30},
+    },
+}
+
+
+def get_db_profile(name: str = None) -> Dict[str, Dict[str, Any]]:
+    name = name or os.environ.get(DB_PROFILE_ENV) or DEFAULT_DB_PROFILE
+    profile = DB_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f'Unknown DB profile: {name}, expected one of {", ".join(DB_PROFILES)}')
+    return profile
+
+
+def apply_db_profile(engine: Engine, profile: Dict[str, Dict[str, Any]]):
+    """Вешает PRAGMA профиля на connect event (для async движка - на его sync_engine)"""
+    pragmas = profile['pragmas']
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+
+def create_profiled_engine(url: str, profile: Dict[str, Dict[str, Any]], **kwargs) -> Engine:
+    engine = create_engine(url, **{**profile['pool'], **kwargs})
+    apply_db_profile(engine, profile)
+    return engine
+
+
+db_profile = get_db_profile()
+
+engine = create_profiled_engine(DATABASE_URL, db_profile)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base: DeclarativeMeta = declarative_base()
 
+# * async движок (aiosqlite) для async роутов - запросы не блокируют event loop
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **db_profile['pool'])
+apply_db_profile(async_engine.sync_engine, db_profile)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 
 def create_all_tables():
     Base.metadata.create_all(bind=engine)
@@ -17,3 +100,64 @@ def get_db():
         yield session
     finally:
         session.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+# * отпечаток схемы в самой БД: воркер пропускает create_all, если метаданные не менялись
+SCHEMA_TABLE = Table(
+    'schema_fingerprint',
+    MetaData(),
+    Column('name', String, primary_key=True),
+    Column('fingerprint', String, nullable=False),
+)
+
+
+def schema_fingerprint(metadata: MetaData, dialect, extra: Sequence[str] = ()) -> str:
+    """sha256 от DDL всех таблиц и индексов метаданных (+ extra - DDL вне метаданных, например FTS)"""
+    digest = hashlib.sha256()
+    for table in metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ''):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    for statement in extra:
+        digest.update(statement.encode())
+    return digest.hexdigest()
+
+
+def ensure_schema(
+    engine: Engine,
+    metadata: MetaData,
+    create: Optional[Callable[[Engine], None]] = None,
+    extra: Sequence[str] = (),
+    name: str = 'default',
+) -> bool:
+    """
+    create_all (и create - доп. объекты схемы) только если отпечаток метаданных
+    отличается от сохранённого в БД. Таблицы, удалённые в обход метаданных,
+    не заметит - для этого достаточно удалить строку из schema_fingerprint.
+    Возвращает True, если схема создавалась
+    """
+    fingerprint = schema_fingerprint(metadata, engine.dialect, extra)
+    with engine.connect() as connection:
+        try:
+            stored = connection.execute(
+                select(SCHEMA_TABLE.c.fingerprint).where(SCHEMA_TABLE.c.name == name)
+            ).scalar()
+        except DBAPIError:
+            # * первая загрузка - таблицы отпечатков ещё нет
+            stored = None
+    if stored == fingerprint:
+        return False
+
+    metadata.create_all(bind=engine)
+    if create is not None:
+        create(engine)
+    with engine.begin() as connection:
+        SCHEMA_TABLE.create(connection, checkfirst=True)
+        connection.execute(delete(SCHEMA_TABLE).where(SCHEMA_TABLE.c.name == name))
+        connection.execute(insert(SCHEMA_TABLE).values(name=name, fingerprint=fingerprint))
+    return True
@@ -58,6 +58,7 @@ class UserAdmin(ModelAdmin):
     
     list_display = ['id', 'username', 'password', 'custom']
     search_columns = ['username']
+    search_fts = True
 
 
 class Flower(Base, TimestampMixin):
@@ -69,9 +70,11 @@ class Flower(Base, TimestampMixin):
 
 class FlowerAdmin(ModelAdmin):
     search_columns = ['name', 'color']
+    search_fts = True
+    cache_list = True
 
 
 class PostAdmin(ModelAdmin):
-    @display(display='Author')
+    @display(display='Author', prefetch=('author',))
     def get_user_id_display(self, obj):
         return obj.author
@@ -1,22 +1,20 @@
 from contextlib import asynccontextmanager
-from typing import Annotated, Any, Optional, Type
-from sqlalchemy.orm import Session, ColumnProperty
+import json
+from typing import Annotated, Type
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from fastapi import FastAPI, Request, Depends
-from fastapi.responses import Response, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from admin import site
-from wtforms import Form
-from admin.utils import form_for_model, AdminForm
+from fastapi.responses import Response, RedirectResponse, JSONResponse, PlainTextResponse
+from admin import site, search, advisor, profiling, metrics
+from admin import settings as admin_settings
+from admin import templating as admin_templating
 from app import model as app_model
-from app.db import get_db, Base, engine
-from app.form import LoginForm
-from wtforms_sqlalchemy.orm import model_form
-from wtforms_alchemy import ModelForm
-from wtforms_sqlalchemy.orm import ModelConverter
-from wtforms.validators import ValidationError, StopValidation
+from app.db import get_db, get_async_db, Base, engine, async_engine, ensure_schema
 from app import crud
+from admin.model import RowKey
 from admin.types import SQLAlchemyModel
-from admin.validators import Unique
 
 
 site.register(app_model.User, app_model.UserAdmin)
@@ -26,28 +24,35 @@ site.register(app_model.Post, app_model.PostAdmin)
 
 @asynccontextmanager
 async def liffespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
+    # * create_all и FTS индексы (для таблиц, созданных до включения search_fts) -
+    # * только если схема изменилась с прошлого запуска
+    ensure_schema(engine, Base.metadata, create=search.create_indexes, extra=search.indexes_ddl())
     yield
 
 
 app = FastAPI(debug=True, lifespan=liffespan)
 
+# * opt-in: к-во SQL, время БД и шаблонов в Server-Timing, предупреждения о N+1
+if admin_settings.get_setting('profiling', 'enabled'):
+    profiling.instrument_engine(engine)
+    profiling.instrument_engine(async_engine.sync_engine)
+    app.add_middleware(profiling.SQLProfilingMiddleware)
 
-@app.middleware("http")
-async def add_models_to_request(request: Request, call_next):
+# * метрики Prometheus на /admin/_metrics, ADMIN_METRICS=0 - выключить
+if admin_settings.get_setting('metrics', 'enabled'):
+    metrics.instrument_engine(engine)
+    metrics.instrument_engine(async_engine.sync_engine)
+    metrics.install_template_timing()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+
+async def add_models_to_request(request: Request, session: Annotated[AsyncSession, Depends(get_async_db)]):
     """
-    Добавляет в [response.state] аттрибут-массив [models_sizes]
-    каждый элемент которого содержит название модели и к-во зарисей
+    Добавляет в [request.state] аттрибут-массив [models_sizes]
+    каждый элемент которого содержит название модели и к-во зарисей.
+    Подключается только к роутам, которые рендерят сайдбар.
     """
-    models_sizes = []
-    models = site.get_all_sqlalchemy_models()
-    session = next(get_db())
-    for model in models:
-        size = session.query(model).count()
-        models_sizes.append((model.__name__, size))
-    request.state.models_sizes = models_sizes
-    response = await call_next(request)
-    return response
+    request.state.models_sizes = await session.run_sync(site.get_models_sizes)
 
 
 def global_context_processor(request: Request) -> dict:
@@ -58,57 +63,130 @@ def global_context_processor(request: Request) -> dict:
     return context
 
 
-templating = Jinja2Templates('app/templates', context_processors=[global_context_processor])
+# * байткод шаблонов на диске и тег {% cache %} (admin.templating)
+templating = profiling.ProfiledTemplates(
+    env=admin_templating.create_environment('app/templates'),
+    context_processors=[global_context_processor],
+)
 
 
 def get_model_class(model_class_name: str) -> Type[SQLAlchemyModel]:
     return getattr(app_model, model_class_name.capitalize(), None)
 
 
-@app.get('/admin/{model_name}', name='admin-model-index')
-def index(request: Request, model_name: str, session: Annotated[Session, Depends(get_db)]):
+def model_form_class(*args, **kwargs):
+    """
+    admin.forms.model_form_class с ленивым импортом: wtforms / wtforms_sqlalchemy
+    грузятся при первой форме, а не на старте воркера
+    """
+    from admin.forms import model_form_class
+    return model_form_class(*args, **kwargs)
+
+
+@app.get('/admin/_advisor', name='admin-index-advisor')
+def index_advisor(request: Request, session: Annotated[Session, Depends(get_db)]):
+    """
+    Отчёт EXPLAIN QUERY PLAN по спискам моделей и недостающие CREATE INDEX.
+    Объявлен до /admin/{model_name}, иначе перехватится им
+    """
+    checks = advisor.check_site(session.connection(), request.query_params.getlist('model') or None)
+    return {'checks': checks, 'statements': advisor.suggestions(checks)}
+
+
+@app.get('/admin/_metrics', name='admin-metrics')
+def admin_metrics():
+    """
+    Метрики в текстовом формате Prometheus (латентность роутов, SQL, шаблоны, кэши).
+    Объявлен до /admin/{model_name}
+    """
+    return PlainTextResponse(metrics.expose(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get('/admin/{model_name}', name='admin-model-index', dependencies=[Depends(add_models_to_request)])
+async def index(request: Request, model_name: str, session: Annotated[AsyncSession, Depends(get_async_db)]):
     """
     Точка входа для спска записей модели
     """
     model_admin = site.get_model_admin_instance(model_name)
-    return model_admin.index_view(templating, request, session)
+    return await model_admin.index_view_async(templating, request, session)
+
+
+@app.get('/admin/{model_name}/lookup', name='admin-model-lookup')
+async def lookup(request: Request, model_name: str, session: Annotated[AsyncSession, Depends(get_async_db)]):
+    """
+    Автодополнение для полей-связей (htmx): варианты записей модели по префиксу
+    """
+    model_admin = site.get_model_admin_instance(model_name)
+    return await session.run_sync(lambda sync_session: model_admin.lookup_view(templating, request, sync_session))
+
+
+@app.get('/admin/{model_name}/json', name='admin-model-json')
+def index_json(request: Request, model_name: str, session: Annotated[Session, Depends(get_db)]):
+    """
+    Потоковый JSON / NDJSON список записей модели
+    """
+    model_admin = site.get_model_admin_instance(model_name)
+    return model_admin.json_view(request, session)
 
 
-@app.get('/admin/{model}/new')
-async def new(request: Request, model: str, session: Annotated[Session, Depends(get_db)]):
+@app.get('/admin/{model_name}/export.csv', name='admin-model-export-csv')
+def export_csv(request: Request, model_name: str, session: Annotated[Session, Depends(get_db)]):
+    """
+    Выгрузка отфильтрованного списка записей модели в CSV
+    """
+    model_admin = site.get_model_admin_instance(model_name)
+    return model_admin.csv_view(request, session)
+
+
+@app.get('/admin/{model}/new', name='admin-model-new')
+async def new(request: Request, model: str, session: Annotated[AsyncSession, Depends(get_async_db)]):
     sqlalchemy_model_class = getattr(app_model, model.capitalize(), None)
     if sqlalchemy_model_class == None:
         return templating.TemplateResponse(request, '404.html', {}, 404)
 
     readonly_fields = ['created_at', 'updated_at']
-    # form = form_for_model(sqlalchemy_model_class, Base, session)()
-    form = model_form(sqlalchemy_model_class, session, AdminForm, converter=MyModelConverter(), exclude=readonly_fields)()
-    # form = PostForm()
-    ctx = {
-        'form': form,
-        'model': model,
-        'method': 'post',
-        'action': f'/admin/{model}/'
-    }
-    return templating.TemplateResponse(request=request, name='add.html', context=ctx)
 
+    # * wtforms_sqlalchemy синхронный: форма (и QuerySelectField при рендере)
+    # * ходит в БД через sync_session внутри run_sync
+    def render(sync_session: Session):
+        # form = form_for_model(sqlalchemy_model_class, Base, session)()
+        form = model_form_class(sqlalchemy_model_class, exclude=readonly_fields)(db_session=sync_session)
+        # form = PostForm()
+        ctx = {
+            'form': form,
+            'model': model,
+            'method': 'post',
+            'action': f'/admin/{model}/'
+        }
+        return templating.TemplateResponse(request=request, name='add.html', context=ctx)
 
-@app.post('/admin/{model}')
-async def create_model(request: Request, model: str, session: Annotated[Session, Depends(get_db)]):
+    return await session.run_sync(render)
+
+
+@app.post('/admin/{model}', name='admin-model-create')
+async def create_model(request: Request, model: str, session: Annotated[AsyncSession, Depends(get_async_db)]):
     sqlalchemy_model_class = getattr(app_model, model.capitalize(), None)
     if sqlalchemy_model_class == None:
         return templating.TemplateResponse(request, '404.html', {}, 404)
 
     readonly_fields = ['created_at', 'updated_at']
     form_data = await request.form()
-    # form = form_for_model(sqlalchemy_model_class, Base, session)(f)
-    form = model_form(sqlalchemy_model_class, session, AdminForm, converter=MyModelConverter(), exclude=readonly_fields)(formdata=form_data)
-    if form.validate():
-        instance = sqlalchemy_model_class(**form.data)
-        session.add(instance)
-        session.commit()
-        return RedirectResponse(f'/admin/{model}', 301)
-    else:
+
+    def create(sync_session: Session):
+        # form = form_for_model(sqlalchemy_model_class, Base, session)(f)
+        form = model_form_class(sqlalchemy_model_class, exclude=readonly_fields)(formdata=form_data, db_session=sync_session)
+        if form.validate():
+            instance = sqlalchemy_model_class(**form.data)
+            sync_session.add(instance)
+            try:
+                sync_session.commit()
+                return RedirectResponse(f'/admin/{model}', 301)
+            except IntegrityError as e:
+                # * значение заняли между проверкой и вставкой
+                sync_session.rollback()
+                if not form.apply_integrity_error(e):
+                    raise
+
         ctx = {
             'form': form,
             'model': model,
@@ -117,58 +195,104 @@ async def create_model(request: Request, model: str, session: Annotated[Session,
         }
         return templating.TemplateResponse(request=request, name='add.html', context=ctx, status_code=400)
 
+    return await session.run_sync(create)
 
-@app.get('/admin/')
+
+@app.get('/admin/', name='admin-index')
 def main(session: Annotated[Session, Depends(get_db)]):
     return 'PLEASE FOLLOW DEEPLINK'
 
 
-@app.post('/admin/{model_name}/delete/')
+@app.post('/admin/{model_name}/delete/', name='admin-model-delete')
 async def delete(
     request: Request,
     model_name: str,
-    session: Annotated[Session, Depends(get_db)]
+    session: Annotated[AsyncSession, Depends(get_async_db)]
 ):
     form_data = await request.form()
     sqlalchemy_model_class = getattr(app_model, model_name.capitalize(), None)
     pk_values = list([v for _, v in form_data.items()])
-    result: crud.DeleteResult = crud.delete_by_pk(sqlalchemy_model_class, pk_values, session)
+    result: crud.DeleteResult = await crud.delete_by_pk_async(sqlalchemy_model_class, pk_values, session)
 
     if result.get('success'):
         return Response(content='', status_code=200)
     return Response(content=result.get('reason'), status_code=400)
 
 
-@app.get('/admin/{model_name}/{id}/edit')
+@app.post('/admin/{model_name}/bulk-delete/', name='admin-model-bulk-delete')
+async def bulk_delete(
+    request: Request,
+    model_name: str,
+    session: Annotated[AsyncSession, Depends(get_async_db)]
+):
+    """
+    Удаление отмеченных в списке записей одним запросом.
+    Каждое значение pk - JSON объект {колонка PK: значение} (record.pks)
+    """
+    form_data = await request.form()
+    sqlalchemy_model_class = getattr(app_model, model_name.capitalize(), None)
+    if sqlalchemy_model_class == None:
+        return Response(content='not_found', status_code=404)
+
+    pk_columns = inspect(sqlalchemy_model_class).primary_key
+    try:
+        pks_list = [json.loads(v) for v in form_data.getlist('pk')]
+        pk_values_list = list([[pks[c.name] for c in pk_columns] for pks in pks_list])
+    except (ValueError, KeyError, TypeError):
+        return Response(content='invalid pk', status_code=400)
+
+    results = await crud.delete_many_by_pk_async(sqlalchemy_model_class, pk_values_list, session)
+    success = all(r.get('success') for r in results)
+    headers = {'HX-Refresh': 'true'} if any(r.get('success') for r in results) else None
+    return JSONResponse({'results': results}, status_code=200 if success else 400, headers=headers)
+
+
+@app.get('/admin/{model_name}/{id}/edit', name='admin-model-edit')
 async def edit(
     request: Request,
     model_name: str,
-    id: int,
-    session: Annotated[Session, Depends(get_db)]
+    id: str,
+    session: Annotated[AsyncSession, Depends(get_async_db)]
 ):
+    """
+    id - PK записи в виде record.path (RowKey): целый PK как есть, иначе base64 ключа
+    """
     sqlalchemy_model_class = getattr(app_model, model_name.capitalize(), None)
     if sqlalchemy_model_class == None:
         return templating.TemplateResponse(request, '404.html', {}, 404)
+    try:
+        pk_values = RowKey(inspect(sqlalchemy_model_class)).parse(id)
+    except ValueError:
+        return templating.TemplateResponse(request, '404.html', {}, 404)
 
     readonly_fields = ['created_at', 'updated_at']
-    # form = form_for_model(sqlalchemy_model_class, Base, session)()
     form_data = await request.form()
-    form = model_form(sqlalchemy_model_class, session, AdminForm, converter=MyModelConverter(), exclude=readonly_fields)(formdata=form_data)
-    # form = PostForm()
-    ctx = {
-        'form': form,
-        'model': model_name,
-        'method': 'post',
-        'action': f'/admin/{model_name}/update/'
-    }
-    return templating.TemplateResponse(request=request, name='add.html', context=ctx)
+
+    def render(sync_session: Session):
+        record = sync_session.get(sqlalchemy_model_class, pk_values)
+        if record is None:
+            return templating.TemplateResponse(request, '404.html', {}, 404)
+        # form = form_for_model(sqlalchemy_model_class, Base, session)()
+        form = model_form_class(sqlalchemy_model_class, exclude=readonly_fields)(
+            formdata=form_data or None, obj=record, db_session=sync_session
+        )
+        # form = PostForm()
+        ctx = {
+            'form': form,
+            'model': model_name,
+            'method': 'post',
+            'action': f'/admin/{model_name}/{id}/update/'
+        }
+        return templating.TemplateResponse(request=request, name='add.html', context=ctx)
+
+    return await session.run_sync(render)
 
 
-@app.post('/admin/{model_name}/{id}/update/')
+@app.post('/admin/{model_name}/{id}/update/', name='admin-model-update')
 async def update(
     request: Request,
     model_name: str,
-    id: int,
-    session: Annotated[Session, Depends(get_db)]
+    id: str,
+    session: Annotated[AsyncSession, Depends(get_async_db)]
 ):
-    return None
\ No newline at end of file
+    return None
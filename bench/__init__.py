@@ -0,0 +1,12 @@
+"""
+Бенчмарки горячих путей админки: index_list, index_view, сайдбар,
+формы и app/crud на заполненной БД заданного размера.
+
+    python -m bench --sizes 1000,100000 --output bench-results.json
+    python -m bench --baseline bench-results.json --threshold 0.2
+
+Результаты пишутся в JSON (медиана/минимум/среднее на вызов), с --baseline
+сравниваются с прошлым прогоном; рост медианы больше threshold - код выхода 1
+
+    python -m bench.imports app.server --top 20    # профиль импорта (холодный старт)
+"""
@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional, Sequence
+
+from app.db import get_db_profile, DB_PROFILE_ENV, DEFAULT_DB_PROFILE
+
+from .cases import GROUPS, BenchEnv
+from .runner import Timing, compare, measure, metadata, read_results, write_results
+
+
+def _sizes(value: str) -> List[int]:
+    return [int(float(size)) for size in value.split(',')]
+
+
+def run(sizes: Sequence[int], groups: Sequence[str], repeat: int, profile_name: str) -> Dict[str, Timing]:
+    profile = get_db_profile(profile_name)
+    results = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            env = BenchEnv(os.path.join(directory, f'bench_{size}.sqlite3'), size, profile)
+            try:
+                for group in groups:
+                    for name, (fn, setup) in GROUPS[group](env).items():
+                        key = f'{name}[{size}]'
+                        results[key] = measure(fn, repeat=repeat, setup=setup)
+                        print(f"{key:<45} {results[key]['median'] * 1000:10.3f} ms", file=sys.stderr)
+            finally:
+                env.close()
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m bench', description='Admin hot path benchmarks')
+    parser.add_argument('--sizes', type=_sizes, default=[1000, 10000], help='table sizes, e.g. 1e3,1e4,1e6')
+    parser.add_argument('--group', action='append', choices=list(GROUPS), help='run only these groups')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--profile', default=os.environ.get(DB_PROFILE_ENV) or DEFAULT_DB_PROFILE)
+    parser.add_argument('--output', default='bench-results.json')
+    parser.add_argument('--baseline', help='previous results JSON to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed median slowdown, 0.2 = 20%%')
+    args = parser.parse_args(argv)
+
+    groups = args.group or list(GROUPS)
+    results = run(args.sizes, groups, args.repeat, args.profile)
+    write_results(args.output, metadata(sizes=args.sizes, groups=groups, repeat=args.repeat, profile=args.profile), results)
+
+    if args.baseline:
+        regressions = compare(results, read_results(args.baseline), args.threshold)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression['name']}: {regression['baseline'] * 1000:.3f} ms -> "
+                f"{regression['current'] * 1000:.3f} ms (x{regression['ratio']:.2f})",
+                file=sys.stderr
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
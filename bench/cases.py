@@ -0,0 +1,157 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from starlette.datastructures import FormData
+
+from admin import site
+from admin.cache import list_cache
+from admin.forms import model_form_class
+from admin.index_list import index_list
+from admin.search import get_index
+from app import crud
+from app.db import apply_db_profile, create_profiled_engine, get_async_db, get_db
+from app.model import Flower, FlowerAdmin, Post
+from app.server import app
+
+from .seed import seed
+
+
+# name -> (fn, setup)
+Case = Tuple[Callable[[], Any], Optional[Callable[[], Any]]]
+
+READONLY_FIELDS = ['created_at', 'updated_at']
+BULK_SIZE = 100
+
+
+class BenchEnv:
+    """Отдельная БД бенчмарка + сессии и TestClient, смотрящие в неё"""
+
+    def __init__(self, path: str, size: int, profile: dict):
+        self.size = size
+        self.engine = create_profiled_engine(f'sqlite:///{path}', profile, connect_args={'check_same_thread': False})
+        self.SessionLocal = sessionmaker(bind=self.engine, autoflush=False)
+        # * TestClient поднимает свой event loop на каждый запрос - без пула aiosqlite соединений
+        self.async_engine = create_async_engine(f'sqlite+aiosqlite:///{path}', poolclass=NullPool)
+        apply_db_profile(self.async_engine.sync_engine, profile)
+        self.AsyncSessionLocal = async_sessionmaker(bind=self.async_engine, autoflush=False, expire_on_commit=False)
+
+        self.rows = seed(self.engine, size)
+        site.counts.invalidate()
+        list_cache.clear()
+
+        def override_get_db():
+            with self.SessionLocal() as session:
+                yield session
+
+        async def override_get_async_db():
+            async with self.AsyncSessionLocal() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        self.client = TestClient(app)
+
+    def close(self):
+        app.dependency_overrides.clear()
+        self.engine.dispose()
+
+
+def _in_session(env: BenchEnv, fn: Callable, rollback: bool = False) -> Callable[[], Any]:
+    """Вызов в новой сессии (как на запрос); rollback - записи не накапливаются между замерами"""
+    def run():
+        with env.SessionLocal() as session:
+            result = fn(session)
+            if rollback:
+                session.rollback()
+            return result
+    return run
+
+
+def _index_list(env: BenchEnv, **params) -> Callable[[], Any]:
+    def run(session):
+        return index_list(
+            request=None,
+            model=Flower,
+            queryset=session.query(Flower),
+            search_column_names=FlowerAdmin.search_columns,
+            **{'limit': 50, 'filters': {}, **params}
+        )
+    return _in_session(env, run)
+
+
+def index_list_cases(env: BenchEnv) -> Dict[str, Case]:
+    middle = env.size // 2
+    return {
+        'index_list.first_page': (_index_list(env), None),
+        'index_list.offset_middle': (_index_list(env, offset=middle), None),
+        'index_list.keyset_first_page': (_index_list(env, cursor=''), None),
+        'index_list.search_ilike': (_index_list(env, search='Роза'), None),
+        'index_list.search_fts': (_index_list(env, search='Роза', search_index=get_index(Flower)), None),
+        'index_list.filters': (_index_list(env, filters={'color': 'белый', 'id__gte': str(middle)}), None),
+        'index_list.order_name': (_index_list(env, order='name', order_type='desc'), None),
+    }
+
+
+def view_cases(env: BenchEnv) -> Dict[str, Case]:
+    def get(path: str, **params):
+        def run():
+            response = env.client.get(path, params=params)
+            assert response.status_code == 200, response.text
+        return run
+
+    def sidebar(session):
+        return site.get_models_sizes(session)
+
+    return {
+        # * без кэша страниц - запрос + рендер каждый раз
+        'index_view.flower': (get('/admin/Flower', limit=50), list_cache.clear),
+        'index_view.flower_cached': (get('/admin/Flower', limit=50), None),
+        'index_view.post_with_author': (get('/admin/Post', limit=50), list_cache.clear),
+        'index_view.flower_stream': (get('/admin/Flower', limit=1000, stream=1), None),
+        'index_json.flower': (get('/admin/Flower/json', limit=500), None),
+        'sidebar.cold': (_in_session(env, sidebar), site.counts.invalidate),
+        'sidebar.warm': (_in_session(env, sidebar), None),
+    }
+
+
+def form_cases(env: BenchEnv) -> Dict[str, Case]:
+    form_class = model_form_class(Post, exclude=READONLY_FIELDS)
+
+    def validate(session):
+        formdata = FormData({'title': 'benchmark title', 'body': 'text', 'author': '1'})
+        assert form_class(formdata=formdata, db_session=session).validate()
+
+    return {
+        'form.build_render': (_in_session(env, lambda session: form_class(db_session=session).author()), None),
+        'form.build_validate': (_in_session(env, validate), None),
+    }
+
+
+def crud_cases(env: BenchEnv) -> Dict[str, Case]:
+    middle = env.size // 2
+    keys = list(range(middle, middle + min(BULK_SIZE, env.size - middle)))
+    return {
+        'crud.retrieve_by_pk': (_in_session(env, lambda s: crud.retrieve_by_pk(Flower, middle, s)), None),
+        'crud.update_by_pk': (_in_session(
+            env, lambda s: crud.update_by_pk(Flower, middle, {'color': 'синий'}, s, commit=False), rollback=True
+        ), None),
+        'crud.delete_by_pk': (_in_session(
+            env, lambda s: crud.delete_by_pk(Flower, middle, s, commit=False), rollback=True
+        ), None),
+        'crud.update_many_by_pk': (_in_session(
+            env, lambda s: crud.update_many_by_pk(Flower, keys, {'color': 'синий'}, s, commit=False), rollback=True
+        ), None),
+        'crud.delete_many_by_pk': (_in_session(
+            env, lambda s: crud.delete_many_by_pk(Flower, keys, s, commit=False), rollback=True
+        ), None),
+    }
+
+
+GROUPS: Dict[str, Callable[[BenchEnv], Dict[str, Case]]] = {
+    'index_list': index_list_cases,
+    'views': view_cases,
+    'forms': form_cases,
+    'crud': crud_cases,
+}
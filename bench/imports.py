@@ -0,0 +1,49 @@
+"""
+Профиль импорта модуля (python -X importtime в отдельном процессе - холодный старт воркера).
+
+    python -m bench.imports app.server --top 20
+"""
+import argparse
+import subprocess
+import sys
+from typing import List, Optional, Sequence, TypedDict
+
+
+class ImportTiming(TypedDict):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def import_times(module: str) -> List[ImportTiming]:
+    """Время импорта каждого модуля, микросекунды (self - без вложенных импортов)"""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True,
+    ).stderr
+
+    timings = list()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings.append(ImportTiming(module=name.strip(), self_us=int(self_us), cumulative_us=int(cumulative_us)))
+    return timings
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m bench.imports', description='Import time profile')
+    parser.add_argument('module', nargs='?', default='app.server')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    timings = import_times(args.module)
+    total = next((t['cumulative_us'] for t in timings if t['module'] == args.module), 0)
+    print(f'{args.module}: {total / 1000:.1f} ms, {len(timings)} modules')
+    for timing in sorted(timings, key=lambda t: t['cumulative_us'], reverse=True)[:args.top]:
+        print(f"{timing['cumulative_us'] / 1000:10.1f} ms {timing['self_us'] / 1000:10.1f} ms  {timing['module']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+from typing import Any, Callable, Dict, List, Optional, TypedDict
+
+import sqlalchemy
+
+
+class Timing(TypedDict):
+    median: float
+    min: float
+    mean: float
+    repeat: int
+    number: int
+
+
+class Regression(TypedDict):
+    name: str
+    baseline: float
+    current: float
+    ratio: float
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, number: int = 1, setup: Callable[[], Any] = None) -> Timing:
+    """
+    repeat замеров по number вызовов, время - секунды на один вызов.
+    setup (если есть) выполняется перед каждым замером и не входит во время
+    """
+    fn()  # * прогрев: компиляция запросов, кэши SQLAlchemy, страницы SQLite
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    return Timing(
+        median=statistics.median(samples),
+        min=min(samples),
+        mean=statistics.fmean(samples),
+        repeat=repeat,
+        number=number,
+    )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(**extra) -> Dict[str, Any]:
+    return {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'sqlalchemy': sqlalchemy.__version__,
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        **extra,
+    }
+
+
+def write_results(path: str, meta: Dict[str, Any], results: Dict[str, Timing]):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'meta': meta, 'results': results}, file, ensure_ascii=False, indent=2)
+
+
+def read_results(path: str) -> Dict[str, Timing]:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)['results']
+
+
+def compare(
+    current: Dict[str, Timing],
+    baseline: Dict[str, Timing],
+    threshold: float = 0.2,
+) -> List[Regression]:
+    """Замеры, медиана которых выросла больше чем на threshold (0.2 = 20%) относительно baseline"""
+    regressions = list()
+    for name, timing in current.items():
+        previous = baseline.get(name)
+        if previous is None or previous['median'] <= 0:
+            continue
+        ratio = timing['median'] / previous['median']
+        if ratio > 1 + threshold:
+            regressions.append(Regression(
+                name=name,
+                baseline=previous['median'],
+                current=timing['median'],
+                ratio=ratio,
+            ))
+    return regressions
@@ -0,0 +1,69 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+from sqlalchemy import Engine, insert
+
+from app.model import Base, Flower, Post, User
+
+
+SEED = 20240101
+CHUNK_SIZE = 10_000
+
+NAMES = ['Роза', 'Лилия', 'Сирень', 'Омела', 'Хмель', 'Пион', 'Астра', 'Ирис', 'Мак', 'Тюльпан']
+COLORS = ['красный', 'белый', 'желтый', 'синий', 'черный', 'розовый']
+WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit']
+
+
+def _chunks(rows: Iterator[dict], size: int = CHUNK_SIZE) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def seed(engine: Engine, size: int, seed: int = SEED) -> Dict[str, int]:
+    """
+    Пересоздаёт схему app/model.py и заполняет её детерминированными данными:
+    size цветов и постов, size // 10 пользователей (минимум 1)
+    """
+    rnd = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    users = max(1, size // 10)
+
+    def flowers():
+        for i in range(size):
+            created = start + timedelta(minutes=i)
+            yield {
+                'name': f'{rnd.choice(NAMES)} {i}',
+                'color': rnd.choice(COLORS),
+                'created_at': created,
+                'updated_at': created,
+            }
+
+    def user_rows():
+        for i in range(users):
+            yield {'username': f'user{i:07d}', 'password': 'x'}
+
+    def posts():
+        for i in range(size):
+            created = start + timedelta(minutes=i)
+            yield {
+                'title': f'post {i}',
+                'body': ' '.join(rnd.choices(WORDS, k=20)),
+                'user_id': rnd.randint(1, users),
+                'created_at': created,
+                'updated_at': created,
+            }
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for model, rows in ((Flower, flowers()), (User, user_rows()), (Post, posts())):
+            for chunk in _chunks(rows):
+                connection.execute(insert(model.__table__), chunk)
+
+    return {'flowers': size, 'users': users, 'posts': size}
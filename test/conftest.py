@@ -1,10 +1,14 @@
+import contextlib
 import pytest
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from fastapi.testclient import TestClient
-from .db import SessionLocal, engine
-from app.db import get_db
+from .db import SessionLocal, AsyncSessionLocal, engine
+from app.db import get_db, get_async_db
 from app.model import Flower, Base
 from app.server import app
+from admin import site
+from admin.cache import list_cache
 
 
 def db_prep():
@@ -29,6 +33,8 @@ def db_prep():
 def db():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    site.counts.invalidate()
+    list_cache.clear()
     db_prep()
     db = SessionLocal()
     try:
@@ -41,5 +47,29 @@ def db():
 def client(db: Session):
     def override_get_db():
         yield db
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     return TestClient(app)
+
+
+@pytest.fixture
+def capture_statements():
+    """
+    with capture_statements() as statements: ... - SQL, выполненные внутри блока
+    на тестовом движке (или на переданном bind)
+    """
+    @contextlib.contextmanager
+    def capture(bind=engine):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(bind, 'before_cursor_execute', listener)
+        try:
+            yield statements
+        finally:
+            event.remove(bind, 'before_cursor_execute', listener)
+    return capture
@@ -1,7 +1,16 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool
+from app.db import apply_db_profile, get_db_profile
 
 
 DB_FILE_NAME = 'test.sqlite3'
 engine = create_engine(f'sqlite:///{DB_FILE_NAME}', connect_args={'check_same_thread': False})
+apply_db_profile(engine, get_db_profile())
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+# * TestClient поднимает свой event loop - соединения aiosqlite между ними не переиспользуем
+async_engine = create_async_engine(f'sqlite+aiosqlite:///{DB_FILE_NAME}', poolclass=NullPool)
+apply_db_profile(async_engine.sync_engine, get_db_profile())
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
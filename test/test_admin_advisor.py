@@ -0,0 +1,48 @@
+from admin import advisor, site
+
+
+def _check(checks, model, kind, column=None):
+    return next(c for c in checks if c['model'] == model and c['kind'] == kind and c['column'] == column)
+
+
+def test_candidate_columns():
+    columns = advisor.candidate_columns(site.get_model_admin_instance('post'))
+    assert columns['filter'] == ['user_id']
+    assert 'id' not in columns['order']
+    assert 'title' in columns['order']
+
+
+def test_flags_full_scan_and_temp_sort(db):
+    checks = advisor.check_site(db.connection())
+
+    order_name = _check(checks, 'Flower', 'order', 'name')
+    assert order_name['temp_sort']
+    assert order_name['suggestion'] == 'CREATE INDEX IF NOT EXISTS ix_flowers_name ON flowers (name)'
+
+    filter_user = _check(checks, 'Post', 'filter', 'user_id')
+    assert filter_user['full_scan']
+    assert filter_user['suggestion'] == 'CREATE INDEX IF NOT EXISTS ix_posts_user_id ON posts (user_id)'
+
+    # * unique колонка уже с индексом
+    assert _check(checks, 'Post', 'order', 'title')['suggestion'] is None
+    # * FTS поиск идёт по виртуальной таблице и PK
+    assert not _check(checks, 'Flower', 'search')['full_scan']
+
+
+def test_apply_suggestions(db):
+    connection = db.connection()
+    statements = advisor.suggestions(advisor.check_site(connection, ['flower']))
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+    checks = advisor.check_site(connection, ['flower'])
+    assert advisor.suggestions(checks) == []
+    assert not _check(checks, 'Flower', 'order', 'name')['temp_sort']
+
+
+def test_advisor_endpoint(client):
+    response = client.get('/admin/_advisor', params={'model': 'flower'})
+    assert response.status_code == 200
+    body = response.json()
+    assert {c['model'] for c in body['checks']} == {'Flower'}
+    assert 'CREATE INDEX IF NOT EXISTS ix_flowers_color ON flowers (color)' in body['statements']
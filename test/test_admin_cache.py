@@ -0,0 +1,95 @@
+from admin.cache import ResultCache, list_cache, table_versions
+from app import crud
+from app.model import Flower, FlowerAdmin
+
+
+def test_result_cache_lru_by_entries():
+    cache = ResultCache(max_entries=2, max_bytes=1000)
+    cache.set('a', 1, 10)
+    cache.set('b', 2, 10)
+    assert cache.get('a') == 1
+    cache.set('c', 3, 10)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def test_result_cache_lru_by_bytes():
+    cache = ResultCache(max_entries=10, max_bytes=100)
+    cache.set('a', 1, 60)
+    cache.set('b', 2, 60)
+    assert cache.get('a') is None
+    assert cache.size_bytes == 60
+    # * запись больше лимита не кэшируется
+    cache.set('huge', 3, 101)
+    assert cache.get('huge') is None
+
+
+def test_versions_bump_on_flush_and_commit(db):
+    before = table_versions.get(['flowers'])
+    db.add(Flower(name='Пион', color='розовый'))
+    db.flush()
+    flushed = table_versions.get(['flowers'])
+    assert flushed > before
+    db.commit()
+    assert table_versions.get(['flowers']) > flushed
+
+
+def test_index_page_served_from_cache(client):
+    client.get('/admin/Flower', params={'limit': 3})
+    hits = list_cache.hits
+    response = client.get('/admin/Flower', params={'limit': '3'})
+    assert response.status_code == 200
+    assert response.text.count('<tr id="record_') == 3
+    assert list_cache.hits == hits + 1
+
+
+def test_order_type_not_shared_between_cache_entries(client):
+    def ids(order_type):
+        response = client.get('/admin/Flower/json', params={'limit': 3, 'order': 'id', 'order_type': order_type})
+        return [record[0] for record in response.json()['records']]
+
+    # * index_query сортирует по убыванию только для 'desc'
+    client.get('/admin/Flower', params={'limit': 3, 'order': 'id', 'order_type': 'DESC'})
+    response = client.get('/admin/Flower', params={'limit': 3, 'order': 'id', 'order_type': 'desc'})
+    assert response.text.index('>12<') < response.text.index('>11<') < response.text.index('>10<')
+    assert ids('desc') == [12, 11, 10]
+
+
+def test_list_cache_opt_in():
+    from admin.model import ModelAdmin
+
+    assert ModelAdmin(Flower)._list_cache_key(dict(filters={}), None) is None
+    assert FlowerAdmin(Flower)._list_cache_key(dict(filters={}), None) is not None
+
+
+def test_result_cache_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('admin.cache.time.monotonic', lambda: now[0])
+    cache = ResultCache(max_entries=10, max_bytes=1000, ttl=30)
+    cache.set('a', 1, 10)
+    now[0] += 29
+    assert cache.get('a') == 1
+    now[0] += 2
+    assert cache.get('a') is None
+    assert cache.size_bytes == 0
+
+
+def test_cached_rows_hold_no_orm_objects(db):
+    from app.model import Post, PostAdmin, User
+
+    db.add(Post(title='t', body='', author=User(username='alice')))
+    db.commit()
+    admin = PostAdmin(Post)
+    records, _, _ = admin._cache_page(('test', 'post'), [], admin._records(db.query(Post).all()))
+    assert 'alice' in records[0].values
+    assert not any(hasattr(value, '_sa_instance_state') for value in records[0].values)
+    assert list_cache.get(('test', 'post'))[0] is records
+
+
+def test_write_invalidates_cached_page(client, db):
+    assert 'Шиповник' not in client.get('/admin/Flower', params={'limit': 3}).text
+    crud.update_by_pk(Flower, 1, {'name': 'Шиповник'}, db)
+    assert 'Шиповник' in client.get('/admin/Flower', params={'limit': 3}).text
+
+    client.post('/admin/flower/delete/', data={'id': 2})
+    assert 'id="record_2"' not in client.get('/admin/Flower', params={'limit': 3}).text
@@ -0,0 +1,67 @@
+import re
+from sqlalchemy import delete
+
+from admin import site
+from app.model import Flower
+
+
+def test_counts_seeded_from_db(db):
+    assert site.counts.get(db, Flower) == 12
+
+
+def test_counts_resync_when_invalidated_between_reads(db):
+    # * invalidate() в другом потоке успел убрать к-во, но не время синхронизации
+    site.counts.sync(db, Flower)
+    site.counts._counts.pop(Flower)
+    assert site.counts.get(db, Flower) == 12
+
+
+def test_counts_follow_insert_after_commit(db):
+    site.counts.get(db, Flower)
+    db.add(Flower(name='Пион', color='розовый'))
+    db.flush()
+    assert site.counts.get(db, Flower) == 12
+    db.commit()
+    assert site.counts.get(db, Flower) == 13
+
+
+def test_counts_ignore_rolled_back_insert(db):
+    site.counts.get(db, Flower)
+    db.add(Flower(name='Пион', color='розовый'))
+    db.flush()
+    db.rollback()
+    assert site.counts.get(db, Flower) == 12
+
+
+def test_counts_follow_delete(db):
+    site.counts.get(db, Flower)
+    db.delete(db.get(Flower, 1))
+    db.commit()
+    assert site.counts.get(db, Flower) == 11
+
+
+def test_counts_follow_bulk_delete(db):
+    site.counts.get(db, Flower)
+    db.execute(delete(Flower).where(Flower.color == 'белый'))
+    db.commit()
+    assert site.counts.get(db, Flower) == 7
+
+
+def test_get_models_sizes(db):
+    assert ('Flower', 12) in site.get_models_sizes(db)
+
+
+def _sidebar_size(html: str, model: str) -> int:
+    match = re.search(rf'>{model}</a>\s*</td>\s*<td[^>]*>\s*(\d+)\s*</td>', html)
+    assert match, f'no sidebar row for {model}'
+    return int(match.group(1))
+
+
+def test_index_renders_sidebar_sizes(client, db):
+    response = client.get('/admin/Flower')
+    assert response.status_code == 200
+    assert _sidebar_size(response.text, 'Flower') == 12
+
+    db.add(Flower(name='Пион', color='розовый'))
+    db.commit()
+    assert _sidebar_size(client.get('/admin/Flower').text, 'Flower') == 13
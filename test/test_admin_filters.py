@@ -0,0 +1,66 @@
+import pytest
+
+from admin.filters import FilterError, compile_filter
+from app.model import Flower
+
+
+def _ids(client, **filters):
+    params = {f'filters[{key}]': value for key, value in filters.items()}
+    response = client.get('/admin/Flower/json', params=dict(params, limit=20))
+    assert response.status_code == 200, response.text
+    return [record[0] for record in response.json()['records']]
+
+
+def test_compiled_once_per_key():
+    assert compile_filter(Flower, 'id__gte') is compile_filter(Flower, 'id__gte')
+
+
+def test_value_coerced_to_column_type():
+    clause = compile_filter(Flower, 'id__gte')('3')
+    assert clause.right.value == 3
+    assert compile_filter(Flower, 'name')('3').right.value == '3'
+
+
+def test_in_between_isnull(client):
+    assert _ids(client, id__in='2, 5,7') == [2, 5, 7]
+    assert _ids(client, id__between='3,5') == [3, 4, 5]
+    assert _ids(client, name__isnull='true') == []
+    assert len(_ids(client, name__isnull='0')) == 12
+
+
+def test_startswith_is_range(client):
+    clause = compile_filter(Flower, 'name__startswith')('Ла')
+    assert 'LIKE' not in str(clause)
+    assert _ids(client, name__startswith='Ла') == [3]
+    assert _ids(client, name__startswith='Д') == [7, 9]
+
+
+def test_invalid_filters_400(client):
+    for params in (
+        {'filters[nope]': '1'},
+        {'filters[id__near]': '1'},
+        {'filters[id__gte]': 'abc'},
+        {'filters[id__between]': '1'},
+        {'filters[name__isnull]': 'maybe'},
+    ):
+        response = client.get('/admin/Flower/json', params=params)
+        assert response.status_code == 400, params
+
+    response = client.get('/admin/Flower', params={'filters[id__gte]': 'abc'})
+    assert response.status_code == 400
+    assert 'id__gte' in response.json()['detail']
+
+
+def test_unknown_field_raises():
+    with pytest.raises(FilterError):
+        compile_filter(Flower, 'nope')
+
+
+def test_renamed_column_field():
+    from .test_admin_model import Membership
+
+    # * атрибут member_id, колонка в БД - 'member'
+    clause = compile_filter(Membership, 'member_id__gte')('8')
+    assert (clause.left.name, clause.right.value) == ('member', 8)
+    with pytest.raises(FilterError):
+        compile_filter(Membership, 'member')
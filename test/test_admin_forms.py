@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from starlette.datastructures import FormData
+
+from admin.forms import model_form_class
+from app.model import Post, User
+
+
+READONLY_FIELDS = ['created_at', 'updated_at']
+
+
+def test_form_class_cached():
+    form_class = model_form_class(Post, exclude=READONLY_FIELDS)
+    assert model_form_class(Post, exclude=tuple(reversed(READONLY_FIELDS))) is form_class
+    assert model_form_class(Post) is not form_class
+
+
+def test_form_binds_session_per_instance(db):
+    alice = User(username='alice')
+    db.add(alice)
+    db.commit()
+    form = model_form_class(Post, exclude=READONLY_FIELDS)(formdata=FormData({'author': str(alice.id)}), db_session=db)
+    assert 'value="alice"' in form.author()
+    assert form.author.data is alice
+
+
+def test_unbound_form_relationship_fails_loudly():
+    form = model_form_class(Post, exclude=READONLY_FIELDS)(formdata=FormData({'author': '1'}))
+    with pytest.raises(RuntimeError):
+        form.author.data
+
+
+def test_fk_field_does_not_load_target_table(db, capture_statements):
+    db.add_all([User(username=f'user {i}') for i in range(20)])
+    db.commit()
+    with capture_statements() as statements:
+        html = model_form_class(Post, exclude=READONLY_FIELDS)(db_session=db).author()
+    assert statements == []
+    assert 'hx-get="/admin/user/lookup"' in html
+
+
+def test_fk_field_rejects_unknown_pk(db):
+    form = model_form_class(Post, exclude=READONLY_FIELDS)(formdata=FormData({'title': 't', 'author': '999'}), db_session=db)
+    assert not form.validate()
+    assert form.author.errors
+
+
+def test_unique_uses_instance_session(db):
+    db.add(User(username='alice'))
+    db.commit()
+    form_class = model_form_class(User)
+    form = form_class(formdata=FormData({'username': 'alice'}), db_session=db)
+    assert not form.validate()
+    assert form.username.errors == ['Must be unique']
+
+
+def test_unique_checks_batched_in_one_query(db, capture_statements):
+    db.add(Post(title='taken'))
+    db.commit()
+    with capture_statements() as statements:
+        form = model_form_class(Post, exclude=READONLY_FIELDS)(formdata=FormData({'title': 'taken'}), db_session=db)
+        assert not form.validate()
+    assert form.title.errors == ['Must be unique']
+    assert len([s for s in statements if 'EXISTS' in s]) == 1
+    assert not [s for s in statements if 'FROM posts' in s and 'EXISTS' not in s]
+
+
+def test_unique_error_from_integrity_error(db):
+    db.add(User(username='alice'))
+    db.commit()
+    db.add(User(username='alice'))
+    with pytest.raises(IntegrityError) as error:
+        db.commit()
+    db.rollback()
+    form = model_form_class(User)(formdata=FormData({'username': 'alice'}), db_session=db)
+    assert form.apply_integrity_error(error.value)
+    assert form.username.errors == ['Must be unique']
+    assert 'is-invalid' in form.username.render_kw['class']
+
+
+def test_invalid_class_not_leaking_between_instances(db):
+    db.add(User(username='alice'))
+    db.commit()
+    form_class = model_form_class(User)
+    assert not form_class(formdata=FormData({'username': 'alice'}), db_session=db).validate()
+    assert 'is-invalid' not in form_class(db_session=db).username.render_kw['class']
@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+
+from admin.index_list import index_list, index_list_async, decode_cursor
+from app.model import Flower, FlowerAdmin, Post
+from .db import AsyncSessionLocal
+
+
+def _page(db, cursor='', **kwargs):
+    return index_list(
+        request=None,
+        model=Flower,
+        queryset=db.query(Flower),
+        search_column_names=FlowerAdmin.search_columns,
+        limit=5,
+        filters={},
+        cursor=cursor,
+        **kwargs
+    )
+
+
+def test_keyset_walks_forward(db):
+    page1 = _page(db)
+    assert [f.id for f in page1] == [1, 2, 3, 4, 5]
+    assert page1.prev_cursor is None
+
+    page2 = _page(db, page1.next_cursor)
+    assert [f.id for f in page2] == [6, 7, 8, 9, 10]
+
+    page3 = _page(db, page2.next_cursor)
+    assert [f.id for f in page3] == [11, 12]
+    assert page3.next_cursor is None
+
+
+def test_keyset_walks_backward(db):
+    page2 = _page(db, _page(db).next_cursor)
+    page1 = _page(db, page2.prev_cursor)
+    assert [f.id for f in page1] == [1, 2, 3, 4, 5]
+    assert page1.prev_cursor is None
+    assert page1.next_cursor
+
+
+def test_keyset_desc(db):
+    page1 = _page(db, order='id', order_type='desc')
+    assert [f.id for f in page1] == [12, 11, 10, 9, 8]
+    page2 = _page(db, page1.next_cursor, order='id', order_type='desc')
+    assert [f.id for f in page2] == [7, 6, 5, 4, 3]
+
+
+def test_keyset_order_with_pk_tie_breaker(db):
+    seen = []
+    cursor = ''
+    while cursor is not None:
+        page = _page(db, cursor, order='color')
+        seen.extend((f.color, f.id) for f in page)
+        cursor = page.next_cursor
+    assert seen == sorted(seen)
+    assert len(seen) == 12
+
+
+def test_invalid_cursor(db):
+    with pytest.raises(ValueError):
+        _page(db, 'garbage')
+    with pytest.raises(ValueError):
+        decode_cursor('e30')
+
+
+def test_keyset_async_order_outside_projection(db):
+    # * колонка сортировки не входит в load_only - курсор не должен догружать её лениво
+    async def main():
+        async with AsyncSessionLocal() as session:
+            return await index_list_async(
+                request=None,
+                model=Flower,
+                session=session,
+                statement=select(Flower).options(load_only(Flower.id)),
+                search_column_names=FlowerAdmin.search_columns,
+                limit=5,
+                order='name',
+                filters={},
+                cursor='',
+            )
+
+    page = asyncio.run(main())
+    assert len(page) == 5
+    assert decode_cursor(page.next_cursor)[1][0] == sorted(f.name for f in db.query(Flower))[4]
+
+
+@pytest.mark.parametrize('order_type', ['asc', 'desc'])
+def test_keyset_nullable_order_column(db, order_type):
+    # * (title, id) > (NULL, :id) не истинно никогда - NULL-строки не должны теряться
+    db.add_all([Post(title=title, body='') for title in [None, 'b', None, 'a', None, 'c', 'b2']])
+    db.commit()
+
+    def page(cursor):
+        return index_list(
+            request=None, model=Post, queryset=db.query(Post), search_column_names=[],
+            limit=2, filters={}, cursor=cursor, order='title', order_type=order_type,
+        )
+
+    pages = [page('')]
+    while pages[-1].next_cursor is not None:
+        pages.append(page(pages[-1].next_cursor))
+    seen = [post.id for p in pages for post in p]
+
+    nulls = [1, 3, 5]
+    ordered = nulls + [4, 2, 7, 6] if order_type == 'asc' else [6, 7, 2, 4] + nulls[::-1]
+    assert seen == ordered
+
+    # * и обратно от последней страницы
+    back = [post.id for post in page(pages[-1].prev_cursor)]
+    assert back == [post.id for post in pages[-2]]
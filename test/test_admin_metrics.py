@@ -0,0 +1,71 @@
+import threading
+
+from admin import metrics
+from .db import async_engine, engine
+
+
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
+
+def _samples(text: str) -> dict:
+    samples = dict()
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_histogram_shards_merged():
+    histogram = metrics.Histogram('test_seconds', 'test', ('route',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, 'a')
+
+    thread = threading.Thread(target=lambda: [histogram.observe(0.5, 'a'), histogram.observe(5, 'a')])
+    thread.start()
+    thread.join()
+
+    samples = _samples('\n'.join(histogram.expose()))
+    assert samples['test_seconds_bucket{route="a",le="0.1"}'] == 1
+    assert samples['test_seconds_bucket{route="a",le="1.0"}'] == 2
+    assert samples['test_seconds_bucket{route="a",le="+Inf"}'] == 3
+    assert samples['test_seconds_count{route="a"}'] == 3
+    assert samples['test_seconds_sum{route="a"}'] == 5.55
+
+
+def test_metrics_endpoint(client):
+    # * MetricsMiddleware подключен в app.server (settings metrics.enabled)
+    before = _samples(client.get('/admin/_metrics').text)
+    assert client.get('/admin/Flower', params={'limit': 3}).status_code == 200
+
+    response = client.get('/admin/_metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+
+    samples = _samples(response.text)
+    key = 'admin_request_duration_seconds_count{route="admin-model-index"}'
+    assert samples[key] == before.get(key, 0) + 1
+    assert samples['admin_requests_total{route="admin-model-index",method="GET",status="200"}'] >= 1
+    assert samples['admin_db_statement_duration_seconds_count'] > before.get('admin_db_statement_duration_seconds_count', 0)
+    assert samples['admin_template_render_duration_seconds_count'] >= 1
+    assert 'admin_cache_hit_ratio{cache="list"}' in samples
+    assert 'admin_cache{cache="lookup_label",stat="hits"}' in samples
+
+
+def test_failed_statement_leaves_no_state_on_connection():
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    def count():
+        return metrics.db_statement_duration.values().get((), [None, 0, 0])[2]
+
+    with engine.connect() as connection:
+        for _ in range(3):
+            try:
+                connection.execute(text('SELECT * FROM no_such_table'))
+            except OperationalError:
+                connection.rollback()
+        before = count()
+        connection.execute(text('SELECT 1'))
+        assert count() == before + 1
+        assert not [key for key in connection.info if str(key).startswith('admin_')]
@@ -1,4 +1,54 @@
+import base64
+import csv
+import io
+import json
+import re
 import pytest
+from sqlalchemy import ForeignKey, Integer, String, inspect
+from sqlalchemy.orm import DeclarativeBase, mapped_column, relationship
+
+from admin.export import csv_stream
+from admin.model import ModelAdmin, display
+from app.model import Flower, FlowerAdmin, Post, User, UserAdmin
+from .db import engine
+
+
+class MembershipBase(DeclarativeBase):
+    pass
+
+
+class Team(MembershipBase):
+    __tablename__ = 'team'
+    id = mapped_column(Integer, primary_key=True)
+    name = mapped_column(String)
+
+    def __str__(self):
+        return self.name
+
+
+class Membership(MembershipBase):
+    """Составной PK и колонки, чьи имена в БД отличаются от атрибутов"""
+    __tablename__ = 'membership'
+    group = mapped_column(String, primary_key=True)
+    member_id = mapped_column('member', Integer, primary_key=True)
+    team_id = mapped_column('team', ForeignKey('team.id'))
+    role = mapped_column(String)
+    team = relationship(Team)
+
+
+@pytest.fixture
+def memberships(db):
+    MembershipBase.metadata.drop_all(bind=engine)
+    MembershipBase.metadata.create_all(bind=engine)
+    team = Team(name='core')
+    db.add_all([
+        Membership(group='a/b', member_id=8, role='member', team=team),
+        Membership(group='a/b', member_id=7, role='owner', team=team),
+    ])
+    db.commit()
+    yield db
+    db.rollback()
+    MembershipBase.metadata.drop_all(bind=engine)
 
 
 def test_index(client):
@@ -152,3 +202,229 @@ def test_flower_filter_by_id_eq(client):
     records = response_json.get('records')
     assert len(records) == 1
     assert records[0][0] == 3
+
+
+def test_json_records_as_objects(client):
+    response = client.get('/admin/Flower/json', params={'compact': 0, 'limit': 1})
+    assert response.status_code == 200
+    records = response.json().get('records')
+    assert records[0]['name'] == 'Роза'
+
+
+def test_ndjson_compact(client):
+    response = client.get('/admin/Flower/json', params={'format': 'ndjson', 'limit': 2})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == ['id', 'name', 'color', 'created_at', 'updated_at']
+    assert len(lines) == 3
+    assert lines[1][:3] == [1, 'Роза', 'красный']
+
+
+def test_ndjson_objects(client):
+    response = client.get('/admin/Flower/json', params={'format': 'ndjson', 'compact': 0, 'limit': 2})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 2
+    assert lines[1]['id'] == 2
+
+
+def test_json_cursor(client):
+    response = client.get('/admin/Flower/json', params={'cursor': '', 'limit': 5})
+    assert response.status_code == 200
+    response_json = response.json()
+    assert len(response_json.get('records')) == 5
+    response = client.get('/admin/Flower/json', params={'cursor': response_json['next_cursor'], 'limit': 5})
+    assert response.json().get('records')[0][0] == 6
+
+
+def test_json_unknown_format(client):
+    response = client.get('/admin/Flower/json', params={'format': 'xml'})
+    assert response.status_code == 400
+
+
+def test_export_csv(client):
+    response = client.get('/admin/Flower/export.csv', params={'filters[color]': 'белый', 'order': 'id', 'order_type': 'desc'})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ['id', 'name', 'color', 'created_at', 'updated_at']
+    assert len(rows) == 6
+    assert rows[1][:3] == ['11', 'Хмель', 'белый']
+
+
+def test_export_csv_chunks(client):
+    rows = list(csv_stream(['n'], ([i] for i in range(1000)), size=100))
+    assert len(rows) > 1
+    assert b''.join(rows).decode().splitlines()[-1] == '999'
+
+
+def test_display_plan_compiled_once():
+    admin = UserAdmin(User)
+    plan = admin.display_plan
+    assert UserAdmin(User).display_plan is plan
+    assert plan.headers == ['ID', 'UserName', 'password', 'Custom']
+    assert plan.custom == [True, True, False, True]
+
+
+def test_display_plan_row_getter():
+    user = User(id=1, username='admin', password='secret')
+    assert UserAdmin(User).row_getter(user) == (1, 'admin', 'secret', 'custom field value for class: "User"')
+    flower = Flower(id=2, name='Роза', color='красный')
+    assert FlowerAdmin(Flower).row_getter(flower)[:3] == (2, 'Роза', 'красный')
+
+
+def test_list_projection_loads_only_displayed_columns(db):
+    class ShortPostAdmin(ModelAdmin):
+        list_display = ['id', 'title']
+
+    db.add(Post(title='hello', body='long body'))
+    db.commit()
+    db.expunge_all()
+
+    admin = ShortPostAdmin(Post)
+    assert admin.display_plan.load_columns == ['id', 'title']
+    post = admin.get_list_queryset(None, db).first()
+    assert 'body' in inspect(post).unloaded
+    assert 'title' not in inspect(post).unloaded
+
+
+def test_list_projection_opt_out():
+    class FullPostAdmin(ModelAdmin):
+        list_display = ['id', 'summary']
+
+        @display(display='Summary', full_object=True)
+        def get_summary_display(self, obj):
+            return obj.body[:10]
+
+    class DeclaredPostAdmin(FullPostAdmin):
+        @display(display='Summary', columns=('body',))
+        def get_summary_display(self, obj):
+            return obj.body[:10]
+
+    assert FullPostAdmin(Post).display_plan.load_columns is None
+    assert DeclaredPostAdmin(Post).display_plan.load_columns == ['id', 'body']
+
+
+def _seed_posts(db, count=5):
+    for i in range(count):
+        db.add(Post(title=f'post {i}', body='...', author=User(username=f'author {i}')))
+    db.commit()
+    db.expunge_all()
+
+
+def test_prefetch_declared_in_display(db, capture_statements):
+    from app.model import PostAdmin
+
+    _seed_posts(db)
+    admin = PostAdmin(Post)
+    assert admin.display_plan.prefetch == ['author']
+    assert 'user_id' in admin.display_plan.load_columns
+
+    with capture_statements() as statements:
+        rows = [admin.row_getter(post) for post in admin.get_list_queryset(None, db).all()]
+
+    assert len(statements) == 1
+    assert [str(row[3]) for row in rows] == [f'author {i}' for i in range(5)]
+
+
+def test_relationship_in_list_display(db):
+    class AuthorPostAdmin(ModelAdmin):
+        list_display = ['id', 'author']
+
+    class PostsUserAdmin(ModelAdmin):
+        list_display = ['id', 'posts']
+
+    _seed_posts(db, 2)
+    post = AuthorPostAdmin(Post).get_list_queryset(None, db).first()
+    assert 'author' not in inspect(post).unloaded
+
+    admin = PostsUserAdmin(User)
+    assert admin.display_plan.prefetch == ['posts']
+    user = admin.get_list_queryset(None, db).first()
+    assert 'posts' not in inspect(user).unloaded
+
+
+def test_unknown_prefetch():
+    class BrokenPostAdmin(ModelAdmin):
+        list_display = ['id', 'summary']
+
+        @display(display='Summary', prefetch=('nope',))
+        def get_summary_display(self, obj):
+            return obj.nope
+
+    with pytest.raises(ValueError):
+        BrokenPostAdmin(Post).display_plan
+
+
+def test_records_keys(db):
+    flower = db.query(Flower).filter(Flower.id == 1).one()
+    record, = FlowerAdmin(Flower)._records([flower])
+    assert list(record)[:3] == [1, 'Роза', 'красный']
+    assert (record.ids, record.pks, record.path) == ('1', '{"id": 1}', '1')
+
+
+def test_records_composite_key():
+    class MembershipAdmin(ModelAdmin):
+        list_display = ['role']
+
+    record, = MembershipAdmin(Membership)._records([Membership(group='a/b', member_id=7, role='owner')])
+    assert list(record) == ['owner']
+    assert record.ids == 'k' + base64.urlsafe_b64encode(b'["a/b", 7]').decode().rstrip('=')
+    assert json.loads(record.pks) == {'group': 'a/b', 'member': 7}
+    assert record.path == record.ids
+
+
+def test_list_query_renamed_columns(memberships):
+    # * имя колонки в БД ('member', 'team') отличается от атрибута - load_only по ключам атрибутов
+    class MembershipAdmin(ModelAdmin):
+        list_display = ['group', 'member_id', 'team']
+
+    admin = MembershipAdmin(Membership)
+    assert admin.display_plan.load_columns == ['group', 'member_id', 'team_id']
+    query = admin.get_list_queryset(None, memberships).order_by(Membership.member_id)
+    rows = [tuple(map(str, record)) for record in admin._records(query.all())]
+    assert rows == [('a/b', '7', 'core'), ('a/b', '8', 'core')]
+    assert MembershipAdmin(Membership)._sql_columns() == ['group', 'member_id', 'team_id', 'role']
+
+
+def test_list_query_composite_dom_ids(memberships):
+    class MembershipAdmin(ModelAdmin):
+        list_display = ['role']
+
+    admin = MembershipAdmin(Membership)
+    records = admin._records(admin.get_list_queryset(None, memberships).order_by(Membership.member_id).all())
+    assert [json.loads(record.pks) for record in records] == [
+        {'group': 'a/b', 'member': 7}, {'group': 'a/b', 'member': 8}
+    ]
+    # * id строки попадает в hx-target="#record_..." - только символы CSS-идентификатора
+    assert all(re.fullmatch(r'[A-Za-z0-9_-]+', record.ids) for record in records)
+
+    row_key = admin.display_plan.row_key
+    assert row_key.dom_id(('a-b', 1)) != row_key.dom_id(('a', 'b-1'))
+    assert row_key.dom_id((12,)) == '12'
+
+
+def test_edit_link_composite_key(client, memberships, monkeypatch):
+    # * '/' и ',' в значениях PK: Starlette раскодирует %2F / %2C до роута
+    from app import model as app_model
+    monkeypatch.setattr(app_model, 'Membership', Membership, raising=False)
+    team = memberships.query(Team).one()
+    memberships.add_all([
+        Membership(group='a,b', member_id=7, role='comma', team=team),
+        Membership(group='a', member_id=7, role='plain', team=team),
+    ])
+    memberships.commit()
+
+    class MembershipAdmin(ModelAdmin):
+        list_display = ['role']
+
+    admin = MembershipAdmin(Membership)
+    records = admin._records(admin.get_list_queryset(None, memberships).all())
+    assert len(records) == 4
+    for record in records:
+        response = client.get(f'/admin/membership/{record.path}/edit')
+        assert response.status_code == 200
+        assert f'value="{record.values[0]}"' in response.text
+
+    assert client.get('/admin/membership/k!!/edit').status_code == 404
+    assert client.get('/admin/membership/' + admin.display_plan.row_key.path(('a', 9)) + '/edit').status_code == 404
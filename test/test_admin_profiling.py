@@ -0,0 +1,73 @@
+import logging
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from admin import site
+from admin.model import display
+from admin.profiling import SQLProfilingMiddleware, instrument_engine, profile_request
+from app.model import Flower, Post, PostAdmin, User
+from app.server import app
+from .db import async_engine, engine
+
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+
+def _timings(header: str) -> dict:
+    metrics = dict()
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+def test_server_timing_header(client):
+    profiled = TestClient(SQLProfilingMiddleware(app))
+    response = profiled.get('/admin/Flower', params={'limit': 3})
+    assert response.status_code == 200
+
+    metrics = _timings(response.headers['Server-Timing'])
+    assert set(metrics) == {'db', 'tpl', 'total'}
+    assert metrics['db']['desc'] != '"0 queries"'
+    assert float(metrics['tpl']['dur']) > 0
+
+
+def test_no_profile_outside_middleware(client):
+    response = client.get('/admin/Flower', params={'limit': 3})
+    assert 'Server-Timing' not in response.headers
+
+
+def test_repeated_statements_detected(db):
+    with profile_request() as profile:
+        for flower_id in range(1, 7):
+            db.execute(select(Flower).where(Flower.id == flower_id)).scalar()
+    assert profile.queries == 6
+    assert [count for _, count in profile.repeated(5)] == [6]
+
+
+def test_n_plus_one_warning(client, db, caplog):
+    class LazyPostAdmin(PostAdmin):
+        @display(display='Author')
+        def get_user_id_display(self, obj):
+            return obj.author
+
+    for i in range(5):
+        db.add(Post(title=f'post {i}', author=User(username=f'user {i}')))
+    db.commit()
+    profiled = TestClient(SQLProfilingMiddleware(app, threshold=3))
+
+    # * без prefetch каждая строка догружает автора отдельным запросом
+    site.register(Post, LazyPostAdmin)
+    try:
+        with caplog.at_level(logging.WARNING, logger='admin.profiling'):
+            assert profiled.get('/admin/Post/json').status_code == 200
+    finally:
+        site.register(Post, PostAdmin)
+    assert [r for r in caplog.records if 'possible N+1' in r.getMessage()]
+
+    caplog.clear()
+    db.expire_all()
+    with caplog.at_level(logging.WARNING, logger='admin.profiling'):
+        assert profiled.get('/admin/Post/json').status_code == 200
+    assert not caplog.records
@@ -0,0 +1,93 @@
+from sqlalchemy import delete, text
+
+from admin.index_list import index_list
+from admin.search import get_index
+from app.model import Flower, FlowerAdmin
+
+
+def _search(db, search, search_index=None, **kwargs):
+    return index_list(
+        request=None,
+        model=Flower,
+        queryset=db.query(Flower),
+        search_column_names=FlowerAdmin.search_columns,
+        limit=20,
+        search=search,
+        filters={},
+        search_index=search_index,
+        **kwargs
+    )
+
+
+def test_fts_table_created_with_model(db):
+    name = db.execute(text("SELECT name FROM sqlite_master WHERE name = 'flowers_fts'")).scalar()
+    assert name == 'flowers_fts'
+
+
+def test_fts_matches_word_prefix_case_insensitive(db):
+    index = get_index(Flower)
+    assert [f.name for f in _search(db, 'роз', index)] == ['Роза']
+    assert {f.id for f in _search(db, 'белый', index)} == {3, 6, 8, 10, 11}
+    # * несколько слов - все должны совпасть (в любой из колонок)
+    assert [f.name for f in _search(db, 'драконий красный', index)] == ['Драконий корень']
+
+
+def test_fts_follows_writes(db):
+    index = get_index(Flower)
+    db.add(Flower(name='Пион', color='розовый'))
+    rose = db.get(Flower, 1)
+    rose.name = 'Шиповник'
+    db.execute(delete(Flower).where(Flower.id == 3))
+    db.commit()
+
+    assert [f.name for f in _search(db, 'пион', index)] == ['Пион']
+    assert _search(db, 'роза', index) == []
+    assert [f.id for f in _search(db, 'шиповник', index)] == [1]
+    assert 3 not in {f.id for f in _search(db, 'белый', index)}
+
+
+def test_fts_keeps_explicit_order_and_keyset(db):
+    index = get_index(Flower)
+    records = _search(db, 'белый', index, order='id', order_type='desc')
+    assert [f.id for f in records] == [11, 10, 8, 6, 3]
+
+    page = _search(db, 'белый', index, cursor='')
+    assert [f.id for f in page] == [3, 6, 8, 10, 11]
+
+
+def test_fts_ignores_query_syntax(db):
+    index = get_index(Flower)
+    assert _search(db, '"*', index) == _search(db, '', index)
+    assert [f.name for f in _search(db, 'роза OR NOT', index)] == []
+
+
+def test_ilike_fallback_without_index(db):
+    assert [f.name for f in _search(db, 'Роза')] == ['Роза']
+    assert [f.name for f in _search(db, 'ижов')] == ['Крижовник']
+
+
+def test_fts_rebuilt_when_columns_change(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from admin.search import indexes_ddl, create_indexes, register_index
+    from app.db import Base, ensure_schema
+
+    engine = create_engine(f'sqlite:///{tmp_path / "db.sqlite3"}')
+    try:
+        index = register_index(Flower, ['name'])
+        assert ensure_schema(engine, Base.metadata, create=create_indexes, extra=indexes_ddl()) is True
+        with Session(engine) as session:
+            session.add(Flower(name='Мак', color='crimson'))
+            session.commit()
+            assert _search(session, 'crimson', index) == []
+
+        index = register_index(Flower, ['name', 'color'])
+        assert ensure_schema(engine, Base.metadata, create=create_indexes, extra=indexes_ddl()) is True
+        with Session(engine) as session:
+            assert [f.name for f in _search(session, 'crimson', index)] == ['Мак']
+            session.add(Flower(name='Тюльпан', color='crimson'))
+            session.commit()
+            assert len(_search(session, 'crimson', index)) == 2
+    finally:
+        register_index(Flower, FlowerAdmin.search_columns)
+        engine.dispose()
@@ -0,0 +1,48 @@
+import os
+import jinja2
+
+from admin.templating import create_environment, fragment_cache
+
+
+def _environment(templates: dict, **options) -> jinja2.Environment:
+    options.setdefault('bytecode_cache', None)
+    return create_environment('.', loader=jinja2.DictLoader(templates), **options)
+
+
+def test_fragment_cached_by_version():
+    calls = []
+    env = _environment({'page.html': '{% cache "block", version %}{{ render() }}{% endcache %}'})
+    template = env.get_template('page.html')
+
+    def render():
+        calls.append(1)
+        return '<b>%d</b>' % len(calls)
+
+    assert template.render(version=1, render=render) == '&lt;b&gt;1&lt;/b&gt;'
+    assert template.render(version=1, render=render) == '&lt;b&gt;1&lt;/b&gt;'
+    assert template.render(version=[('Flower', 2)], render=render) == '&lt;b&gt;2&lt;/b&gt;'
+    assert len(calls) == 2
+    assert fragment_cache.hits >= 1
+
+
+def test_bytecode_cache_written(tmp_path):
+    env = _environment({'page.html': 'hello {{ name }}'}, bytecode_cache=jinja2.FileSystemBytecodeCache(str(tmp_path)))
+    assert env.get_template('page.html').render(name='world') == 'hello world'
+    assert os.listdir(tmp_path)
+
+
+def test_sidebar_rendered(client):
+    response = client.get('/admin/Flower', params={'limit': 1})
+    assert response.status_code == 200
+    assert '/admin/Flower' in response.text
+
+    hits = fragment_cache.hits
+    assert client.get('/admin/Flower', params={'limit': 1}).text.count('card-title') == 1
+    assert fragment_cache.hits == hits + 1
+
+
+def test_bytecode_cache_default_directory():
+    from admin.templating import bytecode_cache
+
+    # * без настройки - каталог Jinja по умолчанию (на пользователя), а не общий путь в /tmp
+    assert bytecode_cache().directory == jinja2.FileSystemBytecodeCache().directory
@@ -0,0 +1,106 @@
+import asyncio
+
+from app import crud
+from app.model import Flower, Post, User
+from .db import AsyncSessionLocal
+
+
+def test_delete_by_pk(db):
+    result = crud.delete_by_pk(Flower, 1, db)
+    assert result == {'success': True, 'reason': None, 'error': None}
+    assert db.get(Flower, 1) is None
+
+
+def test_delete_by_pk_not_found(db):
+    result = crud.delete_by_pk(Flower, 100, db)
+    assert result['reason'] == 'not_found'
+
+
+def test_update_by_pk(db):
+    result = crud.update_by_pk(Flower, 1, {'color': 'розовый'}, db)
+    assert result['success']
+    assert result['updated'] == {'color': 'розовый'}
+
+
+def test_retrieve_by_pk(db):
+    result = crud.retrieve_by_pk(Flower, 1, db)
+    assert result['instance'].name == 'Роза'
+
+
+def _run(coroutine_factory):
+    async def main():
+        async with AsyncSessionLocal() as session:
+            return await coroutine_factory(session)
+    return asyncio.run(main())
+
+
+def test_delete_by_pk_async(db):
+    result = _run(lambda session: crud.delete_by_pk_async(Flower, 1, session))
+    assert result['success']
+    assert _run(lambda session: crud.retrieve_by_pk_async(Flower, 1, session))['reason'] == 'not_found'
+
+
+def test_update_by_pk_async(db):
+    result = _run(lambda session: crud.update_by_pk_async(Flower, 2, {'name': 'Лилия белая'}, session))
+    assert result['updated'] == {'name': 'Лилия белая'}
+    assert _run(lambda session: crud.retrieve_by_pk_async(Flower, 2, session))['instance'].name == 'Лилия белая'
+
+
+def test_delete_many_by_pk(db):
+    results = crud.delete_many_by_pk(Flower, ['1', 2, 100, (3, 4)], db)
+    assert [r['success'] for r in results] == [True, True, False, False]
+    assert results[2]['reason'] == 'not_found'
+    assert results[3]['reason'] == 'unknown_error'
+    assert db.query(Flower).count() == 10
+
+
+def test_update_many_by_pk(db):
+    results = crud.update_many_by_pk(Flower, [1, '2', 100], {'color': 'розовый'}, db)
+    assert [r['success'] for r in results] == [True, True, False]
+    assert results[0]['updated'] == {'color': 'розовый'}
+    assert db.get(Flower, 2).color == 'розовый'
+
+
+def test_delete_by_pk_single_statement(db, capture_statements):
+    with capture_statements() as statements:
+        result = crud.delete_by_pk(Flower, 1, db, commit=False)
+    assert result['success']
+    assert len(statements) == 1
+    assert statements[0].startswith('DELETE')
+
+
+def test_update_by_pk_single_statement(db, capture_statements):
+    with capture_statements() as statements:
+        result = crud.update_by_pk(Flower, '1', {'color': 'розовый'}, db, commit=False)
+    assert result['updated'] == {'color': 'розовый'}
+    assert len(statements) == 1
+    assert statements[0].startswith('UPDATE')
+
+
+def test_retrieve_by_pk_uses_identity_map(db, capture_statements):
+    flower = db.get(Flower, 1)
+    with capture_statements() as statements:
+        result = crud.retrieve_by_pk(Flower, 1, db)
+    assert result['instance'] is flower
+    assert statements == []
+
+
+def test_delete_by_pk_keeps_orm_cascades(db):
+    user = User(username='alice', posts=[Post(title='hello')])
+    db.add(user)
+    db.commit()
+    assert crud.delete_by_pk(User, user.id, db)['success']
+    assert db.query(Post).one().user_id is None
+
+
+def test_delete_many_by_pk_keeps_orm_cascades(db):
+    alice = User(username='alice', posts=[Post(title='hello')])
+    bob = User(username='bob', posts=[Post(title='one'), Post(title='two')])
+    db.add_all([alice, bob])
+    db.commit()
+
+    results = crud.delete_many_by_pk(User, [bob.id, 100], db)
+    assert [r['reason'] for r in results] == [None, 'not_found']
+    assert sorted([(post.title, post.user_id) for post in db.query(Post)]) == [
+        ('hello', alice.id), ('one', None), ('two', None)
+    ]
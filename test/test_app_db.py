@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import DB_PROFILE_ENV, apply_db_profile, create_profiled_engine, get_db_profile
+
+
+def _pragmas(connection):
+    return {
+        name: connection.execute(text(f'PRAGMA {name}')).scalar()
+        for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'temp_store', 'mmap_size')
+    }
+
+
+def test_profile_selected_by_env(monkeypatch):
+    monkeypatch.setenv(DB_PROFILE_ENV, 'throughput')
+    assert get_db_profile()['pragmas']['synchronous'] == 'NORMAL'
+    monkeypatch.setenv(DB_PROFILE_ENV, 'nope')
+    with pytest.raises(ValueError):
+        get_db_profile()
+
+
+def test_durable_profile(tmp_path):
+    engine = create_profiled_engine(f'sqlite:///{tmp_path / "db.sqlite3"}', get_db_profile('durable'))
+    with engine.connect() as connection:
+        pragmas = _pragmas(connection)
+    assert pragmas['journal_mode'] == 'wal'
+    assert pragmas['synchronous'] == 2  # FULL
+    assert pragmas['busy_timeout'] == 5000
+    assert pragmas['temp_store'] == 2  # MEMORY
+    assert engine.pool.size() == 5
+
+
+def test_throughput_profile_async(tmp_path):
+    profile = get_db_profile('throughput')
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path / "db.sqlite3"}', **profile['pool'])
+    apply_db_profile(engine.sync_engine, profile)
+
+    async def read():
+        async with engine.connect() as connection:
+            return await connection.run_sync(_pragmas)
+
+    pragmas = asyncio.run(read())
+    asyncio.run(engine.dispose())
+    assert pragmas['journal_mode'] == 'wal'
+    assert pragmas['synchronous'] == 1  # NORMAL
+    assert pragmas['cache_size'] == -64000
+    assert pragmas['mmap_size'] == 256 * 1024 * 1024
+
+
+def test_sqlite_default_profile(tmp_path):
+    engine = create_profiled_engine(f'sqlite:///{tmp_path / "db.sqlite3"}', get_db_profile('sqlite-default'))
+    with engine.connect() as connection:
+        assert _pragmas(connection)['journal_mode'] == 'delete'
+
+
+def test_ensure_schema_skips_unchanged(tmp_path, capture_statements):
+    from sqlalchemy import Column, Integer, MetaData, Table, inspect
+    from app.db import ensure_schema
+
+    engine = create_engine(f'sqlite:///{tmp_path / "db.sqlite3"}')
+    metadata = MetaData()
+    Table('a', metadata, Column('id', Integer, primary_key=True))
+    created = []
+
+    assert ensure_schema(engine, metadata, create=created.append) is True
+    assert inspect(engine).has_table('a')
+
+    with capture_statements(engine) as statements:
+        assert ensure_schema(engine, metadata, create=created.append) is False
+    assert len(statements) == 1  # * только чтение отпечатка
+    assert created == [engine]
+
+    Table('b', metadata, Column('id', Integer, primary_key=True))
+    assert ensure_schema(engine, metadata) is True
+    assert inspect(engine).has_table('b')
+    assert ensure_schema(engine, metadata, extra=['CREATE VIRTUAL TABLE ...']) is True
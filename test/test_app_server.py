@@ -0,0 +1,75 @@
+def test_index_async(client):
+    response = client.get('/admin/Flower', params={'limit': 3})
+    assert response.status_code == 200
+    assert response.text.count('<tr id="record_') == 3
+
+
+def test_new_form(client):
+    response = client.get('/admin/post/new')
+    assert response.status_code == 200
+    assert 'name="title"' in response.text
+
+
+def test_create_model(client):
+    response = client.post('/admin/user', data={'username': 'bob', 'password': 'x'}, follow_redirects=False)
+    assert response.status_code == 301
+    response = client.post('/admin/user', data={'username': 'bob', 'password': 'x'}, follow_redirects=False)
+    assert response.status_code == 400
+    assert 'Must be unique' in response.text
+
+
+def test_delete(client):
+    response = client.post('/admin/flower/delete/', data={'id': 1})
+    assert response.status_code == 200
+    response = client.post('/admin/flower/delete/', data={'id': 1})
+    assert response.status_code == 400
+    assert response.text == 'not_found'
+
+
+def test_bulk_delete(client):
+    response = client.post('/admin/flower/bulk-delete/', data={'pk': ['{"id": 1}', '{"id": 2}']})
+    assert response.status_code == 200
+    assert response.headers['HX-Refresh'] == 'true'
+    assert [r['success'] for r in response.json()['results']] == [True, True]
+
+    response = client.post('/admin/flower/bulk-delete/', data={'pk': ['{"id": 1}', '{"id": 3}']})
+    assert response.status_code == 400
+    assert [r['reason'] for r in response.json()['results']] == ['not_found', None]
+
+
+def test_index_has_row_checkboxes(client):
+    response = client.get('/admin/Flower', params={'limit': 1})
+    assert 'value="{&#34;id&#34;: 1}"' in response.text
+
+
+def test_lookup(client, db):
+    from app.model import User
+    db.add_all([User(username=name) for name in ('alice', 'alex', 'bob')])
+    db.commit()
+
+    response = client.get('/admin/user/lookup', params={'q': 'al', 'format': 'json'})
+    assert response.status_code == 200
+    assert [r['label'] for r in response.json()['results']] == ['alex', 'alice']
+
+    response = client.get('/admin/user/lookup', params={'q': '', 'limit': 1, 'format': 'json'})
+    assert len(response.json()['results']) == 1
+
+    response = client.get('/admin/user/lookup', params={'q': 'bo', 'target': 'author', 'blank': 1})
+    assert 'data-value="3"' in response.text
+    assert 'data-target="author"' in response.text
+    assert '>bob</button>' in response.text
+
+    assert client.get('/admin/user/lookup', params={'limit': 'x'}).status_code == 400
+
+
+def test_index_stream(client):
+    rendered = client.get('/admin/Flower', params={'limit': 3})
+    streamed = client.get('/admin/Flower', params={'limit': 3, 'stream': 1})
+    assert streamed.status_code == 200
+    assert streamed.headers['content-type'] == 'text/html; charset=utf-8'
+    assert streamed.text == rendered.text
+
+
+def test_index_stream_bad_filter(client):
+    response = client.get('/admin/Flower', params={'stream': 1, 'filters[id__gte]': 'x'})
+    assert response.status_code == 400
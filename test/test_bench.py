@@ -0,0 +1,40 @@
+import json
+
+from bench.__main__ import main
+from bench.runner import Timing, compare
+
+
+def _timing(median: float) -> Timing:
+    return Timing(median=median, min=median, mean=median, repeat=1, number=1)
+
+
+def test_compare_flags_slowdowns_over_threshold():
+    baseline = {'a': _timing(1.0), 'b': _timing(1.0), 'gone': _timing(1.0)}
+    current = {'a': _timing(1.1), 'b': _timing(1.5), 'new': _timing(9.0)}
+    regressions = compare(current, baseline, threshold=0.2)
+    assert [r['name'] for r in regressions] == ['b']
+    assert regressions[0]['ratio'] == 1.5
+
+
+def test_bench_smoke(tmp_path):
+    output = tmp_path / 'results.json'
+    assert main(['--sizes', '20', '--repeat', '1', '--output', str(output)]) == 0
+
+    results = json.loads(output.read_text())
+    assert results['meta']['sizes'] == [20]
+    assert 'index_list.search_fts[20]' in results['results']
+    assert 'crud.delete_many_by_pk[20]' in results['results']
+
+    # * против самого себя с огромным запасом - регрессий нет
+    assert main([
+        '--sizes', '20', '--repeat', '1', '--group', 'crud', '--output', str(tmp_path / 'again.json'),
+        '--baseline', str(output), '--threshold', '1000'
+    ]) == 0
+
+
+def test_server_import_defers_forms():
+    from bench.imports import import_times
+
+    modules = set([timing['module'] for timing in import_times('app.server')])
+    assert 'app.server' in modules
+    assert not modules & {'wtforms', 'wtforms_alchemy', 'wtforms_sqlalchemy', 'admin.forms', 'app.form'}